@@ -1,33 +1,38 @@
-import json
+import os
+import sys
 
-# Function to load JSON data from a file
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "common"))
+from jsonIngest import read_json_columns
+
+# Function to load the reviewer and rating columns from a JSON-lines file
 def load_reviews(filename):
-    with open(filename, 'r') as file:
-        return [json.loads(line.strip()) for line in file]
+    return read_json_columns(filename, ["reviewerID", "overall"])
 
 # Function to analyze the reviews
 def analyze_reviews(reviews):
     # Total number of reviews
-    total_reviews = len(reviews)
+    total_reviews = len(reviews["overall"])
     
     # Unique users based on reviewerID
-    unique_users = len(set(review["reviewerID"] for review in reviews))
+    reviewer_codes, reviewers = pd.factorize(reviews["reviewerID"])
+    unique_users = len(reviewers)
     
     # Calculate average rating
-    avg_rating = sum(review["overall"] for review in reviews) / total_reviews
+    avg_rating = reviews["overall"].sum() / total_reviews
     
-    # Find the most frequent reviewer
-    reviewer_counts = {}
-    for review in reviews:
-        reviewer_id = review["reviewerID"]
-        reviewer_counts[reviewer_id] = reviewer_counts.get(reviewer_id, 0) + 1
-    most_frequent_reviewer = max(reviewer_counts, key=reviewer_counts.get)
+    # Find the most frequent reviewer (the first one seen on ties)
+    reviewer_counts = np.bincount(reviewer_codes, minlength=unique_users)
+    most_frequent = int(np.argmax(reviewer_counts))
+    most_frequent_reviewer = reviewers[most_frequent]
     
     # Output the analysis
     print(f"Total number of reviews: {total_reviews}")
     print(f"Number of unique users: {unique_users}")
     print(f"Average rating: {avg_rating:.2f}")
-    print(f"Most frequent reviewer: {most_frequent_reviewer} with {reviewer_counts[most_frequent_reviewer]} reviews")
+    print(f"Most frequent reviewer: {most_frequent_reviewer} with {reviewer_counts[most_frequent]} reviews")
 
 # Example usage
 if __name__ == "__main__":
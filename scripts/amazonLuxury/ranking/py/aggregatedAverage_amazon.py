@@ -1,13 +1,15 @@
 import pandas as pd
-import json
 import numpy as np
 import matplotlib.pyplot as plt
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "common"))
+from datasetCache import load_dataframe
 
 def aggregated_ranking_algorithm(file_path):
-    # Load dataset
-    with open(file_path, 'r') as f:
-        data = [json.loads(line) for line in f]
-    df = pd.DataFrame(data)
+    # Load dataset through the column cache, normalized on the fly as (r - r_min + 1) / (r_max - r_min + 1)
+    df = load_dataframe(file_path, "json", {"item": "asin", "shifted": "normalizedOverall"})
 
     # Compute item rankings as the average of normalized ratings
     item_rankings = df.groupby("asin")["normalizedOverall"].mean().to_dict()
@@ -15,7 +17,7 @@ def aggregated_ranking_algorithm(file_path):
     return item_rankings
 
 # Example usage
-file_path = "/home/martim/Desktop/tese/datasets/amazon_beauty/Luxury_Beauty_5_normalized.json"  # Replace with your dataset path
+file_path = "/home/martim/Desktop/tese/datasets/amazon_beauty/Luxury_Beauty_5.json"  # Replace with your dataset path
 rankings = aggregated_ranking_algorithm(file_path)
 
 # Extract ratings from the rankings
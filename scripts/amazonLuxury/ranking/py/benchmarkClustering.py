@@ -0,0 +1,57 @@
+import os
+import sys
+import time
+import tracemalloc
+
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "common"))
+from sparseClustering import dense_kmeans, sparse_kmeans
+
+# Datasets used for the dense vs sparse benchmark: (name, path, user column, item column, rating column)
+DATASETS = [
+    ("amazon-luxury", "/home/martim/Desktop/tese/datasets/amazon_beauty/Luxury_Beauty_5_normalized.json",
+     "reviewerID", "asin", "normalizedOverall"),
+]
+
+
+# Wall time and peak traced memory (numpy allocations included) of one call
+def measure(function, *args, **kwargs):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, seconds, peak
+
+
+def benchmark(user_ratings, k=5, svd_components=(None, 50), skip_dense=False):
+    n_ratings = sum(len(ratings) for ratings in user_ratings.values())
+    n_items = len({item for ratings in user_ratings.values() for item in ratings})
+    print(f"  {len(user_ratings)} users, {n_items} items, {n_ratings} ratings "
+          f"(dense matrix {len(user_ratings) * n_items * 8 / 2**20:.1f} MiB)")
+
+    if not skip_dense:
+        cluster_map, seconds, peak = measure(dense_kmeans, user_ratings, k)
+        sizes = sorted((len(group) for group in cluster_map.values()), reverse=True)
+        print(f"  dense KMeans:          {seconds:7.2f}s  peak {peak / 2**20:8.1f} MiB  sizes {sizes}")
+
+    for components in svd_components:
+        cluster_map, seconds, peak = measure(sparse_kmeans, user_ratings, k, svd_components=components)
+        sizes = sorted((len(group) for group in cluster_map.values()), reverse=True)
+        label = "sparse MiniBatchKMeans" if components is None else f"SVD({components}) + MiniBatch"
+        print(f"  {label:22s} {seconds:7.2f}s  peak {peak / 2**20:8.1f} MiB  sizes {sizes}")
+
+
+if __name__ == "__main__":
+    k = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    for name, file_path, user_col, item_col, rating_col in DATASETS:
+        if not os.path.exists(file_path):
+            print(f"{name}: {file_path} not found, skipping")
+            continue
+        df = pd.read_json(file_path, lines=True)
+        user_ratings = {user: dict(zip(group[item_col], group[rating_col])) for user, group in df.groupby(user_col)}
+        print(f"{name}:")
+        benchmark(user_ratings, k)
@@ -1,28 +1,26 @@
 import json
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "common"))
+from jsonIngest import read_json_columns
 
 def normalize_rating(rating, r_min, r_max):
     return (rating - r_min + 1) / (r_max - r_min + 1)
 
 def normalize_json_ratings(input_file, output_file):
-    # Reading the JSON data from the file
-    with open(input_file, 'r') as f:
-        data = [json.loads(line) for line in f]
-
-    # Extracting the ratings
-    ratings = [entry['overall'] for entry in data]
-    
-    # Finding the minimum and maximum ratings
-    r_min = min(ratings)
-    r_max = max(ratings)
-
-    # Normalizing the ratings
-    for entry in data:
-        entry['normalizedOverall'] = normalize_rating(entry['overall'], r_min, r_max)
+    # Finding the minimum and maximum ratings from the projected "overall" column
+    ratings = read_json_columns(input_file, ["overall"])["overall"]
+    r_min = float(ratings.min())
+    r_max = float(ratings.max())
 
-    # Writing the normalized data back to a new JSON file
-    with open(output_file, 'w') as f:
-        for entry in data:
-            f.write(json.dumps(entry) + '\n')
+    # Normalizing the ratings while streaming the records to the new JSON file,
+    # so only one review is in memory at a time
+    with open(input_file, 'r') as f, open(output_file, 'w') as out:
+        for line in f:
+            entry = json.loads(line)
+            entry['normalizedOverall'] = normalize_rating(entry['overall'], r_min, r_max)
+            out.write(json.dumps(entry) + '\n')
 
 # Example usage
 input_file = '/home/martim/Desktop/tese/datasets/amazon_beauty/Luxury_Beauty_5.json'  # Replace with your input JSON file path
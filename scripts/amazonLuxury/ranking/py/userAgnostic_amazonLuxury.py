@@ -1,46 +1,25 @@
-import pandas as pd
-import json
 import numpy as np
 import matplotlib.pyplot as plt
+import os
+import sys
 
-def user_agnostic_ranking(file_path, tol=1e-6):
-    # Step 1: Load dataset from JSON lines
-    with open(file_path, 'r') as f:
-        data = [json.loads(line) for line in f]
-    df = pd.DataFrame(data)
-
-    # Step 2: Define output dictionary for item rankings
-    item_rankings = {}
-
-    # Step 3: Iterate over all unique items (products)
-    for item, ratings in df.groupby("asin")["normalizedOverall"]:
-        ratings = list(ratings)  # Convert pandas Series to list
-        converged = False
-
-        # Step 5: Loop until a fixed point is reached
-        while not converged:
-            # Step 6: Compute the mean (μᵢ) of ratings for product i
-            μ_i = np.mean(ratings)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "common"))
+from userAgnostic import dataset_user_agnostic_ranking
+from datasetCache import load_dataset
 
-            # Step 7: Compute the standard deviation (σᵢ)
-            σ_i = np.std(ratings) if len(ratings) > 1 else 0
-
-            # Step 8: Filter out ratings that deviate significantly from the mean
-            new_ratings = [r for r in ratings if (r - μ_i) ** 2 <= σ_i]
-
-            # Step 9: Check for convergence (if no ratings were removed)
-            converged = (len(new_ratings) == len(ratings))
+def user_agnostic_ranking(file_path, tol=1e-6):
+    # Step 1: Load dataset from JSON lines through the column cache
+    dataset = load_dataset(file_path, "json")
 
-            # Step 10: Update the ratings
-            ratings = new_ratings
-        
-        # Step 12: Compute the final ranking as the mean of the filtered ratings
-        item_rankings[item] = np.mean(ratings)
+    # Step 2-12: Filter every item's ratings with (r - μᵢ)² <= σᵢ until no rating is removed,
+    # for all items at once on per-item rating-level counts, and rank by the filtered mean;
+    # ratings are normalized as (r - r_min + 1) / (r_max - r_min + 1) on the rating-level table
+    item_rankings = dataset_user_agnostic_ranking(dataset, "shifted")
 
     return item_rankings
 
 # Example usage
-file_path = "/home/martim/Desktop/tese/datasets/amazon_beauty/Luxury_Beauty_5_normalized.json"  # Adjust to your actual dataset path
+file_path = "/home/martim/Desktop/tese/datasets/amazon_beauty/Luxury_Beauty_5.json"  # Adjust to your actual dataset path
 rankings = user_agnostic_ranking(file_path)
 
 # Extract the ratings from the rankings
@@ -0,0 +1,45 @@
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "common"))
+from datasetPipeline import (Pipeline, load_bookcrossing, age_filter, k_core, sample_users, normalize,
+                             inject_spam)
+
+# Dataset paths (modify these as needed)
+dataset_dir = "/home/martimsbaltazar/Desktop/tese/datasets/BookCrossing"
+cache_dir = os.path.join(dataset_dir, "pipeline_cache")
+
+# Spammer ratios of the attacked versions, computed in parallel
+spam_ratios = [0.10, 0.30, 0.50, 0.70]
+
+# Declare the preparation steps of shortenDataset.py, then the normalization and spam injection;
+# only the stages downstream of a changed parameter or source file are recomputed on a rerun
+pipeline = Pipeline(cache_dir)
+pipeline.add("load", load_bookcrossing, ratings_file=os.path.join(dataset_dir, "Ratings.csv"),
+             users_file=os.path.join(dataset_dir, "Users.csv"))
+pipeline.add("age", age_filter, "load")
+pipeline.add("core", k_core, "age", min_user_ratings=5)
+pipeline.add("sample", sample_users, "core", n_users=6000, seed=42)
+# Ratings.csv keeps the implicit 0 ratings, so the scale is 0..10
+scale = {"scheme": "shifted", "r_min": 0, "r_max": 10}
+pipeline.add("normalized", normalize, "sample", **scale)
+for ratio in spam_ratios:
+    pipeline.add(f"spam_{int(ratio * 100)}", inject_spam, "normalized", spammer_ratio=ratio, lambda_poisson=20,
+                 max_rating=10, **scale, user_col="User-ID", item_col="ISBN", rating_col="Rating",
+                 timestamp_col=None, normalized_col="normalized_rating")
+
+if __name__ == "__main__":
+    pipeline.run()
+
+    # Export the shortened dataset and the attacked versions
+    sample = pipeline.load("sample")
+    sample["users"].to_csv(os.path.join(dataset_dir, "Shortened_Users.csv"), index=False)
+    sample["ratings"].to_csv(os.path.join(dataset_dir, "Shortened_Ratings.csv"), index=False)
+    for ratio in spam_ratios:
+        percent = int(ratio * 100)
+        attacked = pipeline.load(f"spam_{percent}")
+        attacked["ratings"].to_csv(os.path.join(dataset_dir, f"ratings_with_{percent}percent_spam.csv"), index=False)
+        attacked["spam"].to_csv(os.path.join(dataset_dir, f"spam_only_{percent}percent.csv"), index=False)
+
+    print(f"Number of users: {len(sample['users'])}")
+    print(f"Number of ratings: {len(sample['ratings'])}")
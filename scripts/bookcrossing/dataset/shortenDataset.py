@@ -1,5 +1,10 @@
 import pandas as pd
 import numpy as np
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "common"))
+from kCore import filter_k_core
 
 # Set random seed for reproducibility
 np.random.seed(42)
@@ -18,15 +23,9 @@ valid_user_ids = set(users['User-ID'])
 ratings = ratings[ratings['User-ID'].isin(valid_user_ids)]
 
 # Step 3: Apply 5-core filtering (users with at least 5 ratings)
+# peeled with degree counters in one pass over the ratings instead of value_counts rounds
 def filter_5_core(ratings_df):
-    while True:
-        user_counts = ratings_df['User-ID'].value_counts()
-        to_keep = user_counts[user_counts >= 5].index
-        new_ratings_df = ratings_df[ratings_df['User-ID'].isin(to_keep)]
-        if len(new_ratings_df) == len(ratings_df):
-            break
-        ratings_df = new_ratings_df
-    return ratings_df
+    return filter_k_core(ratings_df, 'User-ID', 'ISBN', min_user_ratings=5)
 
 ratings = filter_5_core(ratings)
 
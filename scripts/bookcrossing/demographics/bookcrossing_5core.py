@@ -1,30 +1,37 @@
-from collections import defaultdict
+import os
+import sys
+
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "common"))
+from kCore import k_core_mask
 
 # File paths
 
 input_file = "/home/martim/Desktop/tese/datasets/book_crossing/book_ratings.dat"
 output_file = "/home/martim/Desktop/tese/datasets/book_crossing/book_ratings_5Core.dat"
 
-# Step 1: Read data and count user ratings
-user_ratings_count = defaultdict(int)
+# Step 1: Read data
 data_lines = []
 
 with open(input_file, 'r') as file:
     for line in file:
         user_id, item_id, rating = line.strip().split('\t')
-        user_ratings_count[user_id] += 1
         data_lines.append((user_id, item_id, rating))
 
-# Step 2: Filter users with at least 5 ratings
-users_to_exclude = {user for user, count in user_ratings_count.items() if count < 5}
+# Step 2: Filter users with at least 5 ratings with the k-core engine
+user_codes, _ = pd.factorize(pd.Series([user_id for user_id, _, _ in data_lines]))
+item_codes, _ = pd.factorize(pd.Series([item_id for _, item_id, _ in data_lines]))
+keep = k_core_mask(user_codes, item_codes, min_user_ratings=5)
+users_to_exclude = {data_lines[k][0] for k in (~keep).nonzero()[0]}
 
 # Print users with less than 5 ratings
 print("Users with less than 5 ratings:", users_to_exclude)
 
 # Step 3: Write filtered data to output file
 with open(output_file, 'w') as file:
-    for user_id, item_id, rating in data_lines:
-        if user_id not in users_to_exclude:
+    for (user_id, item_id, rating), kept in zip(data_lines, keep):
+        if kept:
             file.write(f"{user_id}\t{item_id}\t{rating}\n")
 
 print(f"Filtered data saved to {output_file}")
@@ -1,38 +1,19 @@
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "common"))
+from userAgnostic import histogram_user_agnostic_ranking
 
 def user_agnostic_ranking(file_path, tol=1e-6):
     # Step 1: Load dataset (skip header line explicitly)
     df = pd.read_csv(file_path, sep='\t', header=0, names=["user_id", "item_id", "rating", "normalized_rating"])
     
-    # Step 2: Define output dictionary for item rankings
-    item_rankings = {}
-
-    # Step 3: Iterate over all unique items
-    for item, ratings in df.groupby("item_id")["normalized_rating"]:
-        ratings = list(ratings)  # Convert to list
-        converged = False
-
-        # Step 5: Loop until a fixed point is reached
-        while not converged:
-            # Step 6: Compute the mean (μᵢ) of ratings for item i
-            μ_i = np.mean(ratings)
-            
-            # Step 7: Compute the standard deviation (σᵢ)
-            σ_i = np.std(ratings) if len(ratings) > 1 else 0
-
-            # Step 8: Filter out ratings that deviate significantly from the mean
-            new_ratings = [r for r in ratings if (r - μ_i) ** 2 <= σ_i]
-
-            # Step 9: Check for convergence (if no ratings were removed)
-            converged = (len(new_ratings) == len(ratings))
-
-            #step 10: Update the ratings
-            ratings = new_ratings
-        
-        # Step 12: Compute the final ranking as the mean of the filtered ratings
-        item_rankings[item] = np.mean(ratings)
+    # Step 2-12: Filter every item's ratings with (r - μᵢ)² <= σᵢ until no rating is removed,
+    # for all items at once on per-item rating-level counts, and rank by the filtered mean
+    item_rankings = histogram_user_agnostic_ranking(df, "item_id", "normalized_rating")
 
     return item_rankings
 
@@ -0,0 +1,89 @@
+import numpy as np
+
+from fixedPoint import fixed_point
+from userProfiles import ClusterKeyedRatings
+
+
+class ClusterRatings(ClusterKeyedRatings):
+    """
+    ClusterKeyedRatings with the per-item bookkeeping of the cluster-aware
+    reputation iteration, built once.
+
+    Keys are numbered in (cluster, item) order and rows keep their
+    DataFrame order, so the segmented sums of an iteration add the same
+    terms in the same order as the per-group loops of the scripts.
+    """
+
+    def __init__(self, df, user_groups, user_col="user_id", item_col="item_id", rating_col="normalized_rating"):
+        super().__init__(df, user_groups, user_col, item_col, rating_col)
+        self.user_counts = np.bincount(self.user_codes, minlength=self.n_users).astype(np.float64)
+
+        # Items in order of first appearance (df[item_col].unique())
+        _, first_rows = np.unique(self.item_codes, return_index=True)
+        self.unique_order = self.item_codes[np.sort(first_rows)]
+
+        # Keys are cluster-major, so the first key of an item is its first cluster
+        rated_items, first_keys = np.unique(self.key_items, return_index=True)
+        self.first_key = np.full(self.n_items, -1)
+        self.first_key[rated_items] = first_keys
+        # Position of each item in the order the per-cluster loops first met it: (first cluster, item)
+        self.meet_order = np.full(self.n_items, -1, dtype=np.int64)
+        self.meet_order[rated_items] = self.key_clusters[first_keys] * self.n_items + rated_items
+
+    def cluster_item_rankings(self, user_reputation, item_rankings):
+        """
+        Vectorized cluster_item_rankings on code-indexed arrays.
+
+        Each item takes the reputation-weighted mean of the first cluster
+        that rated it (NaN where that cluster's reputations sum to zero).
+        Items no cluster rated inherit, like the script's loop, the value
+        of the last item met that has a defined cluster mean, or keep their
+        previous ranking when there is none.
+        """
+        rep = user_reputation[self.user_codes[self.rows]]
+        weighted_sum = np.bincount(self.row_keys, weights=rep * self.ratings[self.rows], minlength=self.n_keys)
+        total_weight = np.bincount(self.row_keys, weights=rep, minlength=self.n_keys)
+        defined = total_weight > 0
+        means = np.full(self.n_keys, np.nan)
+        means[defined] = weighted_sum[defined] / total_weight[defined]
+
+        rankings = np.array(item_rankings, dtype=np.float64)
+        rated = self.first_key >= 0
+        rankings[rated] = means[self.first_key[rated]]
+
+        if defined.any():
+            candidates = np.unique(self.key_items[defined])
+            last = candidates[np.argmax(self.meet_order[candidates])]
+            inherited = means[np.nonzero(defined & (self.key_items == last))[0][0]]
+            rankings[~rated] = inherited
+        return rankings
+
+    def user_reputations(self, item_rankings, lambda_factor=0.3):
+        """Vectorized update_user_reputations: one pass over all ratings."""
+        errors = np.abs(self.ratings - item_rankings[self.item_codes])
+        avg_error = np.bincount(self.user_codes, weights=errors, minlength=self.n_users) / self.user_counts
+        return np.maximum(1 - lambda_factor * avg_error, 0)
+
+
+def cluster_reputation_ranking(df, user_groups, user_col="user_id", item_col="item_id", rating_col="normalized_rating",
+                               lambda_factor=0.3, tol=1e-6, max_iter=10, acceleration=None):
+    """
+    reputation_based_ranking of the multipartite scripts on ClusterRatings.
+
+    Same starting point (rankings 0.5, reputations 1), same step and the
+    same fixed-point driver; every iteration is two bincount passes over
+    the rating rows. Returns ({item: ranking} in df[item_col].unique()
+    order, trace).
+    """
+    data = ClusterRatings(df, user_groups, user_col, item_col, rating_col)
+    order = data.unique_order
+
+    def step(rankings):
+        current = np.empty(data.n_items)
+        current[order] = rankings
+        reputation = data.user_reputations(current, lambda_factor)
+        return data.cluster_item_rankings(reputation, current)[order]
+
+    initial = data.cluster_item_rankings(np.ones(data.n_users), np.full(data.n_items, 0.5))[order]
+    final, trace = fixed_point(step, initial, tol=tol, max_iter=max_iter, acceleration=acceleration)
+    return dict(zip(np.asarray(data.item_ids)[order].tolist(), final.tolist())), trace
@@ -0,0 +1,113 @@
+import multiprocessing as mp
+import zlib
+
+import networkx as nx
+import numpy as np
+
+from kolmogorovGraph import profile_strings
+from sharding import balanced_shards
+
+# Profiles at least this long (bytes) are compressed once and the primed
+# compressor is cloned per partner; copying the deflate state costs about as
+# much as compressing a couple of kilobytes, so shorter rows recompress u + v
+PRIME_MIN_BYTES = 2048
+
+# Profiles and their compressed sizes, set once per worker process
+_worker_profiles = None
+_worker_sizes = None
+
+
+def _init_worker(profiles, sizes):
+    global _worker_profiles, _worker_sizes
+    _worker_profiles = profiles
+    _worker_sizes = sizes
+
+
+def row_similarities(profiles, sizes, u, threshold):
+    """
+    compression_similarity between user u and every user v > u, keeping sim > threshold.
+
+    c_uv is the zlib size of profile_u + profile_v. For long profiles the
+    compressor is fed profile_u once and copy() of that state compresses
+    only profile_v, which gives byte-for-byte the output of zlib.compress
+    on the concatenation. Returns (v indexes, similarities).
+    """
+    u_bytes = profiles[u]
+    c_u = sizes[u]
+    partners, sims = [], []
+
+    primed = None
+    if len(u_bytes) >= PRIME_MIN_BYTES:
+        primed = zlib.compressobj()
+        head = len(primed.compress(u_bytes))
+
+    for v in range(u + 1, len(profiles)):
+        if primed is not None:
+            clone = primed.copy()
+            c_uv = head + len(clone.compress(profiles[v])) + len(clone.flush())
+        else:
+            c_uv = len(zlib.compress(u_bytes + profiles[v]))
+        c_v = sizes[v]
+        sim = 1 - (c_uv - min(c_u, c_v)) / max(c_u, c_v)
+        if sim > threshold:
+            partners.append(v)
+            sims.append(sim)
+    return partners, sims
+
+
+def _row_range(task):
+    lo, hi, threshold = task
+    rows = []
+    for u in range(lo, hi):
+        partners, sims = row_similarities(_worker_profiles, _worker_sizes, u, threshold)
+        rows.append((u, partners, sims))
+    return rows
+
+
+def compression_pairs(user_ratings, threshold, compressed_sizes=None, separator="", n_workers=None, tasks_per_worker=8):
+    """
+    Stream (u, v, sim) of all user pairs with compression_similarity > threshold.
+
+    Rows u of the upper-triangular pair matrix are grouped into contiguous
+    ranges holding about the same number of pairs and spread over a process
+    pool; ranges come back in order, so pairs are yielded in the same order
+    as itertools.combinations over the users. Yields raw user ids.
+    """
+    users = list(user_ratings.keys())
+    strings = profile_strings(user_ratings, compressed_sizes, separator)
+    profiles = [u_string.encode() for u_string in strings]
+    if compressed_sizes is not None:
+        sizes = [compressed_sizes[u_string] for u_string in strings]
+    else:
+        sizes = [len(zlib.compress(u_bytes)) for u_bytes in profiles]
+
+    n_workers = n_workers or mp.cpu_count()
+    pairs_per_row = np.arange(len(users) - 1, -1, -1)
+    ptr = np.r_[0, np.cumsum(pairs_per_row)]
+    tasks = [(lo, hi, threshold) for lo, hi in balanced_shards(ptr, n_workers * tasks_per_worker)]
+
+    if n_workers == 1:
+        _init_worker(profiles, sizes)
+        results = map(_row_range, tasks)
+        pool = None
+    else:
+        pool = mp.Pool(n_workers, initializer=_init_worker, initargs=(profiles, sizes))
+        results = pool.imap(_row_range, tasks)
+    try:
+        for rows in results:
+            for u, partners, sims in rows:
+                for v, sim in zip(partners, sims):
+                    yield users[u], users[v], sim
+    finally:
+        if pool is not None:
+            pool.terminate()
+
+
+def compression_graph(user_ratings, threshold, compressed_sizes=None, separator="", n_workers=None, add_all_nodes=False):
+    """compute_similarity_matrix with compression_similarity, on the parallel kernel."""
+    graph = nx.Graph()
+    if add_all_nodes:
+        graph.add_nodes_from(user_ratings.keys())
+    for u, v, sim in compression_pairs(user_ratings, threshold, compressed_sizes, separator, n_workers):
+        graph.add_edge(u, v, weight=sim)
+    return graph
@@ -0,0 +1,255 @@
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from jsonIngest import read_json_columns
+from ratingScales import SCHEMES, RatingScale, rating_codes
+
+# Column files of a cached dataset: name -> (file, dtype)
+COLUMN_FILES = {
+    "user": ("user_code.bin", np.int32),
+    "item": ("item_code.bin", np.int32),
+    "rating": ("rating.bin", np.float64),
+    "rating_code": ("rating_code.bin", np.uint8),
+    "timestamp": ("timestamp.bin", np.int64),
+    "normalized": ("normalized.bin", np.float64),
+}
+META_FILE = "meta.json"
+IDS_FILE = "ids.pkl"
+# Bumped whenever the cache layout changes, so older caches are rebuilt
+CACHE_VERSION = 3
+
+# Amazon JSON-lines fields of each cache column
+JSON_COLUMNS = {"user": "reviewerID", "item": "asin", "rating": "overall", "timestamp": "unixReviewTime",
+                "normalized": "normalizedOverall"}
+
+
+def file_hash(file_path, block_size=1 << 20):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_columns(file_path, fmt="movielens"):
+    """
+    Parse a ratings file into {column: array} for the cache columns it has.
+
+    "movielens": user::item::rating::timestamp[::normalized] (ml-1m, ml-100k);
+    "udata": tab-separated user, item, rating, timestamp without a header (ml-100k u.data);
+    "tsv": tab-separated with a header, user, item, rating[, normalized] (BookCrossing);
+    "json": JSON lines with the JSON_COLUMNS fields (Amazon).
+    """
+    if fmt == "movielens":
+        # "::" splits into empty fields with a single ":" separator, which lets the C parser
+        # be used; field k of the record is column 2k
+        df = pd.read_csv(file_path, sep=":", header=None)
+        fields = [df[k].to_numpy() for k in range(0, df.shape[1], 2)]
+        names = ["user", "item", "rating", "timestamp", "normalized"][:len(fields)]
+        return dict(zip(names, fields))
+    if fmt == "udata":
+        df = pd.read_csv(file_path, sep="\t", header=None)
+        return {name: df[k].to_numpy() for k, name in enumerate(["user", "item", "rating", "timestamp"])}
+    if fmt == "tsv":
+        df = pd.read_csv(file_path, sep="\t", header=0)
+        names = ["user", "item", "rating", "normalized"][:min(df.shape[1], 4)]
+        return {name: df.iloc[:, k].to_numpy() for k, name in enumerate(names)}
+    if fmt == "json":
+        fields = {column: np.float64 for column in JSON_COLUMNS.values()}
+        fields.update(reviewerID=object, asin=object, unixReviewTime=np.int64)
+        columns = read_json_columns(file_path, fields)
+        return {name: columns[column] for name, column in JSON_COLUMNS.items() if column in columns}
+    raise ValueError(f"Unknown ratings format: {fmt}")
+
+
+def default_cache_dir(file_path):
+    return f"{file_path}.columns"
+
+
+def convert_dataset(file_path, fmt="movielens", cache_dir=None):
+    """
+    One-time conversion of a ratings file into memory-mappable column files.
+
+    Users and items are coded 0..n-1 in order of first appearance (the raw
+    ids are kept in ids.pkl; a missing id is an id of its own); ratings are stored as one-byte codes into the
+    rating levels listed in meta.json (or as float64 when there are too many
+    distinct values), timestamps and normalized ratings as flat binary
+    columns. meta.json records the source file's
+    size, mtime and content hash, which load_dataset uses to invalidate the
+    cache. The directory is written next to its final place and swapped in,
+    so readers never see a half-written cache.
+    """
+    cache_dir = cache_dir or default_cache_dir(file_path)
+    columns = read_columns(file_path, fmt)
+    user_codes, user_ids = pd.factorize(columns.pop("user"), use_na_sentinel=False)
+    item_codes, item_ids = pd.factorize(columns.pop("item"), use_na_sentinel=False)
+    columns = {"user": user_codes, "item": item_codes, **columns}
+    levels = None
+    if "rating" in columns:
+        coded = rating_codes(columns["rating"])
+        if coded is not None:
+            codes, levels = coded
+            columns = {("rating_code" if name == "rating" else name): (codes if name == "rating" else values)
+                       for name, values in columns.items()}
+
+    tmp_dir = make_tmp_dir(cache_dir)
+    for name, values in columns.items():
+        file_name, dtype = COLUMN_FILES[name]
+        np.asarray(values, dtype=dtype).tofile(os.path.join(tmp_dir, file_name))
+
+    stat = os.stat(file_path)
+    meta = {
+        "version": CACHE_VERSION,
+        "format": fmt,
+        "n_ratings": len(user_codes),
+        "n_users": len(user_ids),
+        "n_items": len(item_ids),
+        "columns": list(columns),
+        "rating_levels": None if levels is None else levels.tolist(),
+        "source_size": stat.st_size,
+        "source_mtime_ns": stat.st_mtime_ns,
+        "source_hash": file_hash(file_path),
+    }
+    with open(os.path.join(tmp_dir, META_FILE), "w") as f:
+        json.dump(meta, f)
+    with open(os.path.join(tmp_dir, IDS_FILE), "wb") as f:
+        pickle.dump({"user_ids": np.asarray(user_ids), "item_ids": np.asarray(item_ids)}, f,
+                    protocol=pickle.HIGHEST_PROTOCOL)
+
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    os.rename(tmp_dir, cache_dir)
+    return cache_dir
+
+
+# Fresh directory next to cache_dir to write a cache into before swapping it in;
+# unique, so concurrent conversions of the same file never write into each other's
+def make_tmp_dir(cache_dir):
+    cache_dir = os.path.abspath(cache_dir)
+    return tempfile.mkdtemp(prefix=f"{os.path.basename(cache_dir)}.", suffix=".tmp", dir=os.path.dirname(cache_dir))
+
+
+# True when the cache in cache_dir was built in format fmt from the current content of file_path
+def is_fresh(file_path, cache_dir, fmt="movielens"):
+    meta_path = os.path.join(cache_dir, META_FILE)
+    if not os.path.exists(meta_path):
+        return False
+    with open(meta_path) as f:
+        meta = json.load(f)
+    if meta.get("version") != CACHE_VERSION or meta.get("format") != fmt:
+        return False
+    stat = os.stat(file_path)
+    if stat.st_size == meta["source_size"] and stat.st_mtime_ns == meta["source_mtime_ns"]:
+        return True
+    # Touched or copied: only the content hash decides
+    if stat.st_size != meta["source_size"] or file_hash(file_path) != meta["source_hash"]:
+        return False
+    meta["source_mtime_ns"] = stat.st_mtime_ns
+    with open(meta_path, "w") as f:
+        json.dump(meta, f)
+    return True
+
+
+class ColumnarDataset:
+    """
+    Read-only memory-mapped columns of a converted dataset.
+
+    Columns are np.memmap views of the files, so opening is a few
+    milliseconds whatever the size and every process mapping the same
+    cache shares the same page-cache pages (no copy, no pickling).
+    Coded ratings are read as ratings, and normalized views of them under
+    any ratingScales scheme, through scale().
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        with open(os.path.join(cache_dir, META_FILE)) as f:
+            self.meta = json.load(f)
+        self.n_ratings = self.meta["n_ratings"]
+        self.n_users = self.meta["n_users"]
+        self.n_items = self.meta["n_items"]
+        self.columns = {}
+        for name in self.meta["columns"]:
+            file_name, dtype = COLUMN_FILES[name]
+            if self.n_ratings == 0:
+                self.columns[name] = np.empty(0, dtype=dtype)  # mmap cannot map an empty file
+                continue
+            self.columns[name] = np.memmap(os.path.join(cache_dir, file_name), dtype=dtype, mode="r",
+                                           shape=(self.n_ratings,))
+        self._ids = None
+        # Column names as the source file has them, coded ratings read as "rating"
+        self.names = ["rating" if name == "rating_code" else name for name in self.meta["columns"]]
+
+    def scale(self, r_min=None, r_max=None):
+        levels = self.meta.get("rating_levels")
+        if levels is None:
+            return RatingScale.from_ratings(self.columns["rating"], r_min, r_max)
+        return RatingScale(self.columns["rating_code"], levels, r_min, r_max)
+
+    def __getitem__(self, name):
+        if name == "rating" and "rating_code" in self.columns:
+            return self.scale().ratings()
+        return self.columns[name]
+
+    def ids(self):
+        if self._ids is None:
+            with open(os.path.join(self.cache_dir, IDS_FILE), "rb") as f:
+                ids = pickle.load(f)
+            self._ids = ids["user_ids"], ids["item_ids"]
+        return self._ids
+
+    def to_dataframe(self, names=None, r_min=None, r_max=None):
+        """
+        DataFrame with raw user / item ids, named like the scripts' loaders.
+
+        names maps cache columns to DataFrame column names, e.g.
+        {"user": "user_id", "item": "item_id", "normalized": "normalized_rating"},
+        or is a list naming the cached columns in file order, like the names
+        argument of read_csv; by default columns keep their cache names.
+        A ratingScales scheme as a key adds the ratings normalized by it,
+        with r_min / r_max defaulting to the data's lowest / highest rating.
+        That materializes a float64 column; kernels that work per rating
+        level take scale().codes and scale().table(scheme) instead (see
+        userAgnostic.dataset_user_agnostic_ranking).
+        """
+        if names is None:
+            names = list(self.names)
+        if isinstance(names, dict):
+            pairs = list(names.items())
+        else:
+            pairs = list(zip(self.names, names))
+            # Names beyond the cached columns become NaN columns, as read_csv fills missing fields
+            pairs += [(None, column) for column in names[len(pairs):]]
+
+        user_ids, item_ids = self.ids()
+        data = {}
+        for name, column in pairs:
+            if name is None:
+                data[column] = np.full(self.n_ratings, np.nan)
+            elif name == "user":
+                data[column] = user_ids[self.columns["user"]]
+            elif name == "item":
+                data[column] = item_ids[self.columns["item"]]
+            elif name in SCHEMES:
+                data[column] = self.scale(r_min, r_max).normalized(name)
+            else:
+                data[column] = np.asarray(self[name])
+        return pd.DataFrame(data)
+
+
+def load_dataset(file_path, fmt="movielens", cache_dir=None):
+    """Open the column cache of file_path, (re)building it if missing or stale."""
+    cache_dir = cache_dir or default_cache_dir(file_path)
+    if not is_fresh(file_path, cache_dir, fmt):
+        convert_dataset(file_path, fmt, cache_dir)
+    return ColumnarDataset(cache_dir)
+
+
+def load_dataframe(file_path, fmt="movielens", names=None, cache_dir=None, r_min=None, r_max=None):
+    return load_dataset(file_path, fmt, cache_dir).to_dataframe(names, r_min, r_max)
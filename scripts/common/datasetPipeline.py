@@ -0,0 +1,345 @@
+import ast
+import hashlib
+import inspect
+import json
+import multiprocessing as mp
+import os
+import pickle
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from datasetCache import file_hash, load_dataframe
+from kCore import filter_k_core
+from ratingScales import SCHEMES, RatingScale
+
+# Default directory of the stage artifacts
+CACHE_DIR = "pipeline_cache"
+
+# BookCrossing column names (Ratings.csv / Users.csv)
+USER_COL = "User-ID"
+ITEM_COL = "ISBN"
+RATING_COL = "Rating"
+AGE_COL = "Age"
+
+
+# Stages: every stage takes the artifacts of its inputs (a {"ratings": df, "users": df or None, ...}
+# dataset) plus keyword parameters and returns a new dataset; none of them modifies its inputs
+
+def load_bookcrossing(ratings_file, users_file):
+    """Ratings.csv and Users.csv as read by shortenDataset.py."""
+    ratings = pd.read_csv(ratings_file, sep=";", skipinitialspace=True)
+    users = pd.read_csv(users_file, sep=",", skipinitialspace=True)
+    return {"ratings": ratings, "users": users}
+
+
+def load_ratings(file_path, fmt="movielens", names=None):
+    """A ratings file through the binary column cache (no users table)."""
+    return {"ratings": load_dataframe(file_path, fmt, names), "users": None}
+
+
+def age_filter(dataset, min_age=None, max_age=None, user_col=USER_COL, age_col=AGE_COL):
+    """Users with a valid integer age (within [min_age, max_age] when given) and their ratings."""
+    users = dataset["users"].copy()
+    users[age_col] = pd.to_numeric(users[age_col], errors="coerce")
+    users = users.dropna(subset=[age_col])
+    users[age_col] = users[age_col].astype(int)
+    if min_age is not None:
+        users = users[users[age_col] >= min_age]
+    if max_age is not None:
+        users = users[users[age_col] <= max_age]
+    ratings = dataset["ratings"]
+    return {**dataset, "users": users, "ratings": ratings[ratings[user_col].isin(set(users[user_col]))]}
+
+
+def _keep_rated_users(dataset, ratings, user_col):
+    users = dataset["users"]
+    if users is not None:
+        users = users[users[user_col].isin(set(ratings[user_col]))]
+    return {**dataset, "users": users, "ratings": ratings}
+
+
+def k_core(dataset, min_user_ratings=5, min_item_ratings=0, user_col=USER_COL, item_col=ITEM_COL):
+    """The (min_user_ratings, min_item_ratings) core of the ratings; users without ratings are dropped."""
+    ratings = filter_k_core(dataset["ratings"], user_col, item_col, min_user_ratings, min_item_ratings)
+    return _keep_rated_users(dataset, ratings, user_col)
+
+
+def top_items(dataset, n_items=4000, item_col=ITEM_COL):
+    """Ratings of the n_items most rated items (value_counts order), as in the filteredDataset notebook."""
+    ratings = dataset["ratings"]
+    keep = ratings[item_col].value_counts().head(n_items).index
+    return {**dataset, "ratings": ratings[ratings[item_col].isin(keep)]}
+
+
+def sample_users(dataset, n_users=6000, seed=42, method="random", user_col=USER_COL):
+    """
+    At most n_users users and their ratings.
+
+    "random" draws them like shortenDataset.py (np.random.seed(seed), then
+    np.random.choice over the users table without replacement); "first"
+    keeps the first n_users by rating count, as the notebook's
+    eligible_users[:6000].
+    """
+    ratings, users = dataset["ratings"], dataset["users"]
+    if method == "random":
+        ids = list(users[user_col]) if users is not None else list(ratings[user_col].unique())
+        if len(ids) <= n_users:
+            return dataset
+        chosen = np.random.RandomState(seed).choice(ids, size=n_users, replace=False)
+    elif method == "first":
+        chosen = ratings[user_col].value_counts().index[:n_users]
+    else:
+        raise ValueError(f"Unknown sampling method: {method}")
+    ratings = ratings[ratings[user_col].isin(chosen)]
+    if users is not None:
+        users = users[users[user_col].isin(chosen)]
+    return {**dataset, "users": users, "ratings": ratings}
+
+
+def normalize(dataset, scheme="shifted", r_min=None, r_max=None, rating_col=RATING_COL,
+              output_col="normalized_rating"):
+    """Add output_col with the ratings normalized by a ratingScales scheme."""
+    ratings = dataset["ratings"].copy()
+    ratings[output_col] = RatingScale.from_ratings(ratings[rating_col], r_min, r_max).normalized(scheme)
+    return {**dataset, "ratings": ratings}
+
+
+def inject_spam(dataset, spammer_ratio=0.1, lambda_poisson=5, max_rating=5, seed=0, timestamp=None,
+                scheme="min_max", r_min=1, r_max=None, user_col="UserID", item_col="MovieID", rating_col="Rating",
+                timestamp_col="Timestamp", normalized_col="NormalizedOverall"):
+    """
+    Random spammers of the rankingAttackers notebook added to the ratings.
+
+    ceil(spammer_ratio x users) new users (ids after the largest one) each
+    rate Poisson(lambda_poisson) + 1 distinct items drawn by popularity with
+    uniform ratings in 1..max_rating, normalized by scheme on the r_min..r_max
+    scale (1..max_rating by default; the notebook's (r - 1) / (max_rating - 1)
+    is "min_max"). Pass the scheme and scale of the normalize stage so spam
+    and genuine ratings are normalized alike. The draws
+    come from a seeded generator and the timestamp is a parameter, so the
+    artifact is reproducible; timestamp_col=None leaves the column out
+    (BookCrossing has none). The spam rows alone are kept under "spam".
+    """
+    ratings = dataset["ratings"]
+    rng = np.random.RandomState(seed)
+    popularity = ratings[item_col].value_counts(normalize=True)
+    item_ids, item_probs = popularity.index.tolist(), popularity.values
+    num_spammers = int(np.ceil(spammer_ratio * ratings[user_col].nunique()))
+    user_id_start = ratings[user_col].max() + 1
+    timestamp = int(time.time()) if timestamp is None else timestamp
+    r_max = max_rating if r_max is None else r_max
+    scale = SCHEMES[scheme](np.arange(1, max_rating + 1, dtype=np.float64), r_min, r_max)
+
+    columns = [user_col, item_col, rating_col] + ([timestamp_col] if timestamp_col else []) + [normalized_col]
+
+    spam_data = []
+    for k in range(num_spammers):
+        num_ratings = rng.poisson(lam=lambda_poisson) + 1
+        for item in rng.choice(item_ids, size=num_ratings, replace=False, p=item_probs):
+            rating = rng.randint(1, max_rating + 1)
+            row = [user_id_start + k, item, rating] + ([timestamp] if timestamp_col else []) + [scale[rating - 1]]
+            spam_data.append(row)
+    spam = pd.DataFrame(spam_data, columns=columns)
+    return {**dataset, "ratings": pd.concat([ratings, spam], ignore_index=True), "spam": spam}
+
+
+# Global names a function's code (and the code nested in it) reads
+def _code_names(code):
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            names |= _code_names(const)
+    return names
+
+
+# {name: module} of the names module imports from other modules of this directory
+# (as "import kCore" or "from kCore import filter_k_core"), read from its import statements
+def _local_imports(module):
+    here = os.path.dirname(os.path.abspath(__file__))
+    imports = {}
+    for node in ast.walk(ast.parse(inspect.getsource(module))):
+        if isinstance(node, ast.Import):
+            pairs = [(alias.asname or alias.name, alias.name) for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            pairs = [(alias.asname or alias.name, node.module) for alias in node.names]
+        else:
+            continue
+        for name, module_name in pairs:
+            dependency = sys.modules.get(module_name)
+            path = getattr(dependency, "__file__", None)
+            if path and os.path.dirname(os.path.abspath(path)) == here:
+                imports[name] = dependency
+    return imports
+
+
+# Content hashes of module and of every module of this directory it imports, directly or not
+def _module_closure(module, seen):
+    if module.__name__ in seen:
+        return
+    seen[module.__name__] = file_hash(module.__file__)
+    for dependency in _local_imports(module).values():
+        _module_closure(dependency, seen)
+
+
+# Hash of what a stage computes: the function's code, its parameters (with the
+# content of every parameter naming an existing file) and its inputs' keys.
+# The code is the function's source, the source of the same-module helpers it
+# calls and the content of every other common/ module they use (and of the
+# modules those import), so editing kCore.py changes the key of the k_core
+# stage and its descendants but not of the loading stages
+def _function_fingerprint(function):
+    sources, modules, stack = {}, {}, [function]
+    while stack:
+        current = stack.pop()
+        name = f"{current.__module__}.{current.__qualname__}"
+        if name in sources:
+            continue
+        try:
+            sources[name] = inspect.getsource(current)
+        except (OSError, TypeError):
+            sources[name] = ""
+        code = getattr(current, "__code__", None)
+        if code is None:
+            continue
+        imports = _local_imports(sys.modules[current.__module__])
+        for global_name in _code_names(code):
+            value = current.__globals__.get(global_name)
+            if global_name in imports:
+                _module_closure(imports[global_name], modules)
+            elif inspect.isfunction(value) and value.__module__ == current.__module__:
+                stack.append(value)
+    return {"sources": sources, "modules": modules}
+
+
+def _param_fingerprint(value):
+    if isinstance(value, str) and os.path.isfile(value):
+        return {"file": value, "hash": file_hash(value)}
+    if isinstance(value, dict):
+        return {str(k): _param_fingerprint(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_param_fingerprint(v) for v in value]
+    return repr(value)
+
+
+def _run_stage(task):
+    function, params, input_paths, output_path = task
+    inputs = []
+    for path in input_paths:
+        with open(path, "rb") as f:
+            inputs.append(pickle.load(f))
+    start = time.perf_counter()
+    artifact = function(*inputs, **params)
+    seconds = time.perf_counter() - start
+    # Written next to its final name and swapped in, so a killed run never leaves a truncated artifact
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(artifact, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, output_path)
+    return seconds
+
+
+class Pipeline:
+    """
+    Declarative dataset preparation with content-hashed, memoized stages.
+
+    Stages are declared with add(name, function, inputs, **params); a
+    stage's key hashes its function's code (with the common/ modules it
+    uses), its parameters (file parameters by content) and the keys of its
+    inputs, and its artifact is pickled under cache_dir as <name>-<key>.pkl.
+    Changing a parameter, a stage's code or a source file therefore changes
+    the keys of that stage and everything downstream only, and run()
+    recomputes just the stages whose artifact is missing. Stages whose inputs are all available run
+    together in a process pool, so independent branches (e.g. one
+    inject_spam per spammer ratio) are computed in parallel.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.stages = {}
+
+    def add(self, name, function, inputs=(), **params):
+        if name in self.stages:
+            raise ValueError(f"Stage already declared: {name}")
+        inputs = [inputs] if isinstance(inputs, str) else list(inputs)
+        for parent in inputs:
+            if parent not in self.stages:
+                raise ValueError(f"Stage {name} depends on undeclared stage {parent}")
+        self.stages[name] = (function, inputs, params)
+        return name
+
+    def keys(self, names=None):
+        """{stage: key} of the given stages and their ancestors, in declaration (topological) order."""
+        needed = self._ancestors(names)
+        keys = {}
+        for name in self.stages:
+            if name not in needed:
+                continue
+            function, inputs, params = self.stages[name]
+            fingerprint = json.dumps({
+                "function": _function_fingerprint(function),
+                "params": _param_fingerprint(params),
+                "inputs": [keys[parent] for parent in inputs],
+            }, sort_keys=True)
+            keys[name] = hashlib.blake2b(fingerprint.encode(), digest_size=16).hexdigest()
+        return keys
+
+    def artifact_path(self, name, key):
+        return os.path.join(self.cache_dir, f"{name}-{key}.pkl")
+
+    def _ancestors(self, names):
+        if names is None:
+            return set(self.stages)
+        needed, stack = set(), [names] if isinstance(names, str) else list(names)
+        while stack:
+            name = stack.pop()
+            if name not in needed:
+                needed.add(name)
+                stack.extend(self.stages[name][1])
+        return needed
+
+    def run(self, targets=None, n_workers=None, verbose=True):
+        """
+        Bring the artifacts of targets (all stages by default) up to date.
+
+        Returns {stage: artifact path}; load() reads an artifact.
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        keys = self.keys(targets)
+        paths = {name: self.artifact_path(name, key) for name, key in keys.items()}
+        pending = [name for name in keys if not os.path.exists(paths[name])]
+        if verbose:
+            for name in keys:
+                if name not in pending:
+                    print(f"  {name}: cached")
+
+        n_workers = n_workers or mp.cpu_count()
+        pool = None
+        try:
+            while pending:
+                ready = [name for name in pending if all(parent not in pending for parent in self.stages[name][1])]
+                tasks = []
+                for name in ready:
+                    function, inputs, params = self.stages[name]
+                    tasks.append((function, params, [paths[parent] for parent in inputs], paths[name]))
+                if len(tasks) > 1 and n_workers > 1:
+                    pool = pool or mp.Pool(n_workers)
+                    seconds = pool.map(_run_stage, tasks)
+                else:
+                    seconds = [_run_stage(task) for task in tasks]
+                if verbose:
+                    for name, elapsed in zip(ready, seconds):
+                        print(f"  {name}: computed in {elapsed:.2f}s")
+                pending = [name for name in pending if name not in ready]
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+        return {name: paths[name] for name in keys}
+
+    def load(self, name):
+        key = self.keys(name)[name]
+        with open(self.artifact_path(name, key), "rb") as f:
+            return pickle.load(f)
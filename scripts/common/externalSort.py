@@ -0,0 +1,205 @@
+import heapq
+import json
+import os
+import pickle
+import shutil
+import tempfile
+from operator import itemgetter
+
+import numpy as np
+
+from datasetCache import CACHE_VERSION, COLUMN_FILES, IDS_FILE, META_FILE, file_hash, make_tmp_dir
+from outOfCoreBipartite import encode_ids
+from ratingScales import MAX_LEVELS
+
+# Field of a "::" record each sort key reads
+SORT_FIELDS = {"user": 0, "item": 1, "timestamp": 3}
+# Runs merged at once; with more runs, consecutive groups are merged into longer runs first
+MAX_MERGE_FANIN = 128
+
+# Rough bytes a held line costs beyond its text (str header, parsed key, tuple, list slot)
+LINE_OVERHEAD = 160
+# Records buffered per column write when streaming binary output
+WRITE_BATCH = 100_000
+
+
+def _sort_key(key):
+    names = (key,) if isinstance(key, str) else tuple(key)
+    for name in names:
+        if name not in SORT_FIELDS:
+            raise ValueError(f"Unknown sort key: {name}")
+    fields = [SORT_FIELDS[name] for name in names]
+
+    def parse(parts):
+        return tuple(int(parts[k]) for k in fields)
+    return parse
+
+
+def _write_run(run, tmp_dir, index):
+    run.sort(key=itemgetter(0))
+    path = os.path.join(tmp_dir, f"run_{index:05d}.dat")
+    with open(path, "w") as f:
+        f.writelines(line for _, line in run)
+    return path
+
+
+def _read_run(path, parse):
+    with open(path) as f:
+        for line in f:
+            yield parse(line.rstrip("\n").split("::")), line
+
+
+def sorted_runs(input_file, key="user", memory_bytes=64 << 20, tmp_dir=None):
+    """
+    Split input_file into sorted runs of at most memory_bytes each.
+
+    Lines are read one at a time and held (with their parsed key) until
+    the run's estimated size reaches memory_bytes; the run is then sorted
+    stably and spilled to a temporary file. Returns (run paths, distinct
+    ratings seen) - the latter lets binary output code ratings without a
+    second pass.
+    """
+    parse = _sort_key(key)
+    runs, run, run_bytes = [], [], 0
+    ratings = set()
+    with open(input_file) as f:
+        for line in f:
+            parts = line.strip().split("::")
+            if parts == [""]:
+                continue
+            if len(ratings) <= MAX_LEVELS:
+                ratings.add(float(parts[2]))
+            run.append((parse(parts), "::".join(parts) + "\n"))
+            run_bytes += len(line) + LINE_OVERHEAD
+            if run_bytes >= memory_bytes:
+                runs.append(_write_run(run, tmp_dir, len(runs)))
+                run, run_bytes = [], 0
+    if run or not runs:
+        runs.append(_write_run(run, tmp_dir, len(runs)))
+    return runs, ratings
+
+
+def merge_runs(run_paths, key="user"):
+    """k-way merge of sorted runs into one stream of lines; equal keys keep their input order."""
+    parse = _sort_key(key)
+    while len(run_paths) > MAX_MERGE_FANIN:
+        # Merging consecutive runs keeps equal keys in input order
+        merged_paths = []
+        for start in range(0, len(run_paths), MAX_MERGE_FANIN):
+            group = run_paths[start:start + MAX_MERGE_FANIN]
+            path = f"{group[0]}.merged"
+            write_lines(merge_runs(group, key), path)
+            for run_path in group:
+                os.remove(run_path)
+            merged_paths.append(path)
+        run_paths = merged_paths
+    merged = heapq.merge(*[_read_run(path, parse) for path in run_paths], key=itemgetter(0))
+    for _, line in merged:
+        yield line
+
+
+def write_lines(lines, output_file):
+    with open(output_file, "w") as f:
+        f.writelines(lines)
+
+
+def write_columns(lines, cache_dir, source_file, ratings, sort_key):
+    """
+    Stream sorted "::" lines into the binary column format of datasetCache.
+
+    Users and items are coded in order of first appearance in the sorted
+    stream; ratings are one-byte codes into the distinct ratings seen while
+    building the runs (float64 when there are more than MAX_LEVELS). Only
+    WRITE_BATCH records and the id dictionaries are held at once. The
+    directory opens with datasetCache.ColumnarDataset.
+    """
+    levels = np.array(sorted(ratings)) if len(ratings) <= MAX_LEVELS else None
+    user_index, user_ids, item_index, item_ids = {}, [], {}, []
+    tmp_dir = make_tmp_dir(cache_dir)
+
+    handles, n_ratings, batch = {}, 0, []
+
+    def flush():
+        fields = list(zip(*batch))
+        columns = {
+            "user": encode_ids(np.array([int(v) for v in fields[0]]), user_index, user_ids),
+            "item": encode_ids(np.array([int(v) for v in fields[1]]), item_index, item_ids),
+        }
+        rating = np.array(fields[2], dtype=np.float64)
+        if levels is not None:
+            columns["rating_code"] = np.searchsorted(levels, rating)
+        else:
+            columns["rating"] = rating
+        columns["timestamp"] = np.array(fields[3], dtype=np.int64)
+        if len(fields) > 4:
+            columns["normalized"] = np.array(fields[4], dtype=np.float64)
+        for name, values in columns.items():
+            file_name, dtype = COLUMN_FILES[name]
+            if name not in handles:
+                handles[name] = open(os.path.join(tmp_dir, file_name), "wb")
+            np.asarray(values, dtype=dtype).tofile(handles[name])
+        batch.clear()
+
+    try:
+        for line in lines:
+            batch.append(line.rstrip("\n").split("::"))
+            n_ratings += 1
+            if len(batch) >= WRITE_BATCH:
+                flush()
+        if batch:
+            flush()
+    finally:
+        for handle in handles.values():
+            handle.close()
+
+    stat = os.stat(source_file)
+    meta = {
+        "version": CACHE_VERSION,
+        "format": "movielens",
+        "n_ratings": n_ratings,
+        "n_users": len(user_ids),
+        "n_items": len(item_ids),
+        "columns": list(handles),
+        "rating_levels": None if levels is None else levels.tolist(),
+        "source_size": stat.st_size,
+        "source_mtime_ns": stat.st_mtime_ns,
+        "source_hash": file_hash(source_file),
+        "sorted_by": [sort_key] if isinstance(sort_key, str) else list(sort_key),
+    }
+    with open(os.path.join(tmp_dir, META_FILE), "w") as f:
+        json.dump(meta, f)
+    with open(os.path.join(tmp_dir, IDS_FILE), "wb") as f:
+        pickle.dump({"user_ids": np.array(user_ids), "item_ids": np.array(item_ids)}, f,
+                    protocol=pickle.HIGHEST_PROTOCOL)
+
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    os.rename(tmp_dir, cache_dir)
+    return cache_dir
+
+
+def external_sort(input_file, output_file, key="user", memory_bytes=64 << 20, output_format="movielens",
+                  tmp_dir=None):
+    """
+    Sort a "::" ratings file of any size by user, item or timestamp.
+
+    key is one of SORT_FIELDS or a tuple of them (e.g. ("user",
+    "timestamp")); the sort is stable, so equal keys keep the input order
+    like list.sort. memory_bytes bounds the lines held in memory at once,
+    whatever the file size: runs of that size are sorted and spilled to
+    temporary files, then streamed through a k-way heap merge.
+    output_format "movielens" writes "::" lines to output_file;
+    "columns" writes the datasetCache column directory output_file.
+    """
+    if output_format not in ("movielens", "columns"):
+        raise ValueError(f"Unknown output format: {output_format}")
+    run_dir = tempfile.mkdtemp(prefix="sort_runs_", dir=tmp_dir)
+    try:
+        runs, ratings = sorted_runs(input_file, key, memory_bytes, run_dir)
+        lines = merge_runs(runs, key)
+        if output_format == "movielens":
+            write_lines(lines, output_file)
+        else:
+            write_columns(lines, output_file, input_file, ratings, key)
+    finally:
+        shutil.rmtree(run_dir, ignore_errors=True)
+    return output_file
@@ -0,0 +1,90 @@
+import time
+from collections import namedtuple
+
+import numpy as np
+
+# One row of the per-iteration telemetry returned by fixed_point
+TraceRow = namedtuple("TraceRow", ["iteration", "residual", "changed", "seconds"])
+# Values of fixed_point's acceleration argument
+ACCELERATIONS = (None, "aitken", "anderson")
+
+
+# Componentwise Aitken delta-squared extrapolation over three consecutive iterates
+def aitken_extrapolate(x0, x1, x2):
+    d1 = x1 - x0
+    d2 = x2 - x1
+    denom = d2 - d1
+    # Only extrapolate components that are actually contracting
+    safe = (np.abs(denom) > 1e-12) & (np.abs(d2) < np.abs(d1))
+    x = x2.copy()
+    x[safe] = x2[safe] - d2[safe] ** 2 / denom[safe]
+    return x
+
+
+# Anderson mixing (type II) over the last few iterates and residuals
+def anderson_extrapolate(g_history, f_history):
+    delta_f = np.diff(np.array(f_history), axis=0).T
+    delta_g = np.diff(np.array(g_history), axis=0).T
+    gamma, *_ = np.linalg.lstsq(delta_f, f_history[-1], rcond=None)
+    return g_history[-1] - delta_g @ gamma
+
+
+def fixed_point(step, x0, tol=1e-6, max_iter=100, acceleration=None, memory=5):
+    """
+    Iterate x <- step(x) until every component moves by at most tol.
+
+    acceleration can be None (plain iteration), "aitken" (componentwise
+    delta-squared every third iterate) or "anderson" (Anderson mixing over
+    the last `memory` iterates, restarted whenever the residual grows).
+
+    Returns (x, trace) where trace holds one TraceRow per iteration: the
+    L-infinity residual |step(x) - x|, the number of components that moved
+    by more than tol, and the wall time of that iteration.
+    """
+    if acceleration not in ACCELERATIONS:
+        raise ValueError(f"Unknown acceleration: {acceleration}")
+    x = np.asarray(x0, dtype=np.float64)
+    trace = []
+    plain_iterates = [x]
+    g_history, f_history = [], []
+
+    for iteration in range(1, max_iter + 1):
+        start = time.perf_counter()
+
+        g = np.asarray(step(x), dtype=np.float64)
+        f = g - x
+        abs_f = np.abs(f)
+        residual = float(abs_f.max(initial=0))
+        changed = int((abs_f > tol).sum())
+
+        if residual <= tol:
+            trace.append(TraceRow(iteration, residual, changed, time.perf_counter() - start))
+            return g, trace
+
+        next_x = g
+        if acceleration == "aitken":
+            plain_iterates.append(g)
+            if len(plain_iterates) == 3:
+                next_x = aitken_extrapolate(*plain_iterates)
+                plain_iterates = [next_x]
+        elif acceleration == "anderson":
+            # Restart the history when the residual stops decreasing
+            if trace and residual > trace[-1].residual:
+                g_history, f_history = [], []
+            g_history.append(g)
+            f_history.append(f)
+            g_history = g_history[-(memory + 1):]
+            f_history = f_history[-(memory + 1):]
+            if len(f_history) > 1:
+                next_x = anderson_extrapolate(g_history, f_history)
+
+        x = next_x
+        trace.append(TraceRow(iteration, residual, changed, time.perf_counter() - start))
+
+    return x, trace
+
+
+# Print a trace as one line per iteration
+def print_trace(trace):
+    for row in trace:
+        print(f"Iteration {row.iteration}: residual={row.residual:.3e} changed={row.changed} ({row.seconds:.3f}s)")
@@ -0,0 +1,299 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+from sparseBipartite import RatingMatrix, bipartite_reputation
+
+
+# Concatenate the slices ptr[k]:ptr[k+1] of `values` for every k in `rows`
+def gather_rows(ptr, values, rows):
+    starts = ptr[rows]
+    lengths = ptr[rows + 1] - starts
+    total = int(lengths.sum())
+    if total == 0:
+        return values[:0]
+    offsets = np.repeat(starts - np.concatenate(([0], np.cumsum(lengths)[:-1])), lengths)
+    return values[offsets + np.arange(total)]
+
+
+class IncrementalBipartiteRanker:
+    """
+    Bipartite reputation ranking that stays at its fixed point while new
+    ratings arrive.
+
+    The ranker converges once over the initial DataFrame and then keeps, per
+    item, the reputation-weighted rating sum and, per user, the summed rating
+    error. A batch of new or changed (user, item, rating) rows only touches
+    those sums and then pushes changes outwards: an item whose ranking moved
+    by more than tol updates the errors of its raters, a user whose
+    reputation moved by more than tol updates the sums of the items it rated,
+    and so on until nothing moves. Untouched parts of the graph are never
+    visited.
+    """
+
+    def __init__(self, df, user_col="user_id", item_col="item_id", rating_col="normalized_rating",
+                 lambda_factor=0.3, tol=1e-6, max_iter=100, max_rounds=1000):
+        self.user_col = user_col
+        self.item_col = item_col
+        self.rating_col = rating_col
+        self.lambda_factor = lambda_factor
+        self.tol = tol
+        self.max_iter = max_iter
+        self.max_rounds = max_rounds
+
+        matrix = RatingMatrix.from_dataframe(df, user_col, item_col, rating_col)
+        rank, rep, _ = bipartite_reputation(matrix, lambda_factor, tol, max_iter)
+
+        self.user_ids = matrix.user_ids.tolist()
+        self.item_ids = matrix.item_ids.tolist()
+        self.user_index = {u: k for k, u in enumerate(self.user_ids)}
+        self.item_index = {i: k for k, i in enumerate(self.item_ids)}
+
+        # All ratings as growable (user_code, item_code, rating) entry arrays
+        self._n = len(matrix.ratings)
+        self._users = matrix.user_codes.copy()
+        self._items = matrix.item_codes.copy()
+        self._ratings = matrix.ratings.copy()
+
+        self.rank = rank
+        self.rep = rep
+        self._recompute_sums()
+        self._build_index()
+
+    # ---- bookkeeping -------------------------------------------------------
+
+    # Recompute every per-item and per-user sum exactly from the current state
+    def _recompute_sums(self):
+        users, items, ratings = self._entries()
+        n_users, n_items = len(self.user_ids), len(self.item_ids)
+
+        # Values last pushed to the neighbours; sums below are built from these
+        self.rank_pushed = self.rank.copy()
+        self.rep_pushed = self.rep.copy()
+
+        self.item_count = np.bincount(items, minlength=n_items).astype(np.float64)
+        self.user_count = np.bincount(users, minlength=n_users).astype(np.float64)
+        self.item_wsum = np.bincount(items, weights=self.rep_pushed[users] * ratings, minlength=n_items)
+        self.user_esum = np.bincount(users, weights=np.abs(ratings - self.rank_pushed[items]), minlength=n_users)
+
+    # Entry ids grouped by user and by item; entries appended later are scanned separately
+    def _build_index(self):
+        users, items, _ = self._entries()
+        self._n_indexed = self._n
+        self._user_ptr = np.concatenate(([0], np.cumsum(np.bincount(users, minlength=len(self.user_ids)))))
+        self._item_ptr = np.concatenate(([0], np.cumsum(np.bincount(items, minlength=len(self.item_ids)))))
+        self._by_user = np.argsort(users, kind="stable")
+        self._by_item = np.argsort(items, kind="stable")
+
+    def _entries(self):
+        return self._users[:self._n], self._items[:self._n], self._ratings[:self._n]
+
+    # Entry ids of all ratings given by `users` (or received by `items`)
+    def _entries_of(self, codes, by_item=False):
+        ptr, order = (self._item_ptr, self._by_item) if by_item else (self._user_ptr, self._by_user)
+        indexed = codes[codes < len(ptr) - 1]
+        found = gather_rows(ptr, order, indexed)
+
+        if self._n > self._n_indexed:
+            owners = (self._items if by_item else self._users)[self._n_indexed:self._n]
+            recent = np.nonzero(np.isin(owners, codes))[0] + self._n_indexed
+            found = np.concatenate((found, recent))
+        return found
+
+    def _append(self, users, items, ratings):
+        needed = self._n + len(users)
+        if needed > len(self._users):
+            capacity = max(needed, 2 * len(self._users))
+            for name in ("_users", "_items", "_ratings"):
+                old = getattr(self, name)
+                new = np.empty(capacity, dtype=old.dtype)
+                new[:self._n] = old[:self._n]
+                setattr(self, name, new)
+        self._users[self._n:needed] = users
+        self._items[self._n:needed] = items
+        self._ratings[self._n:needed] = ratings
+        self._n = needed
+
+    @staticmethod
+    def _grow(array, size, fill):
+        if len(array) >= size:
+            return array
+        return np.concatenate((array, np.full(size - len(array), fill, dtype=np.float64)))
+
+    def _codes(self, raw_ids, index, ids):
+        codes = np.empty(len(raw_ids), dtype=np.int64)
+        for k, raw in enumerate(raw_ids):
+            code = index.get(raw)
+            if code is None:
+                code = len(ids)
+                index[raw] = code
+                ids.append(raw)
+            codes[k] = code
+        return codes
+
+    # ---- updates -----------------------------------------------------------
+
+    def update(self, ratings, measure_residual=True):
+        """
+        Add or change a batch of ratings and move the rankings to the new
+        fixed point, starting from the previous one.
+
+        `ratings` is a DataFrame with the ranker's columns or an iterable of
+        (user, item, rating) tuples. A (user, item) pair that already exists
+        has its rating replaced; within a batch the last row wins.
+
+        Returns a report dict with the number of propagation rounds, how many
+        items and users were recomputed, the wall time, and (if
+        measure_residual) the L-infinity residual of one full synchronous
+        iteration from the new state, i.e. how far the result is from what a
+        full recompute would settle on.
+        """
+        start = time.perf_counter()
+
+        if isinstance(ratings, pd.DataFrame):
+            raw_users = ratings[self.user_col].tolist()
+            raw_items = ratings[self.item_col].tolist()
+            values = ratings[self.rating_col].to_numpy(dtype=np.float64)
+        else:
+            rows = list(ratings)
+            raw_users = [row[0] for row in rows]
+            raw_items = [row[1] for row in rows]
+            values = np.array([row[2] for row in rows], dtype=np.float64)
+
+        n_users_before, n_items_before = len(self.user_ids), len(self.item_ids)
+        users = self._codes(raw_users, self.user_index, self.user_ids)
+        items = self._codes(raw_items, self.item_index, self.item_ids)
+
+        # New users start from reputation 1.0, new items get their ranking once rated
+        n_users, n_items = len(self.user_ids), len(self.item_ids)
+        self.rep = self._grow(self.rep, n_users, 1.0)
+        self.rep_pushed = self._grow(self.rep_pushed, n_users, 1.0)
+        self.user_count = self._grow(self.user_count, n_users, 0.0)
+        self.user_esum = self._grow(self.user_esum, n_users, 0.0)
+        self.rank = self._grow(self.rank, n_items, 0.0)
+        self.rank_pushed = self._grow(self.rank_pushed, n_items, 0.0)
+        self.item_count = self._grow(self.item_count, n_items, 0.0)
+        self.item_wsum = self._grow(self.item_wsum, n_items, 0.0)
+
+        # Last row wins for repeated (user, item) pairs within the batch
+        keys = users * n_items + items
+        keys_reversed = keys[::-1]
+        unique_keys, last = np.unique(keys_reversed, return_index=True)
+        last = len(keys) - 1 - last
+        users, items, values = users[last], items[last], values[last]
+
+        # Split the batch into changes of existing entries and new entries
+        candidates = self._entries_of(np.unique(users))
+        candidate_keys = self._users[candidates] * n_items + self._items[candidates]
+        hit = np.isin(candidate_keys, unique_keys)
+        changed = candidates[hit]
+        batch_pos = np.searchsorted(unique_keys, candidate_keys[hit])
+        is_new = ~np.isin(unique_keys, candidate_keys[hit])
+
+        # Changed ratings: swap the old contribution for the new one
+        if len(changed):
+            cu, ci = self._users[changed], self._items[changed]
+            old, new = self._ratings[changed], values[batch_pos]
+            np.add.at(self.item_wsum, ci, self.rep_pushed[cu] * (new - old))
+            np.add.at(self.user_esum, cu, np.abs(new - self.rank_pushed[ci]) - np.abs(old - self.rank_pushed[ci]))
+            self._ratings[changed] = new
+
+        # New ratings: item sums first, so brand-new items have a ranking to be compared against
+        nu, ni, nr = users[is_new], items[is_new], values[is_new]
+        np.add.at(self.item_wsum, ni, self.rep_pushed[nu] * nr)
+        np.add.at(self.item_count, ni, 1.0)
+        np.add.at(self.user_count, nu, 1.0)
+        fresh_items = np.arange(n_items_before, n_items)
+        self.rank[fresh_items] = self.item_wsum[fresh_items] / np.maximum(self.item_count[fresh_items], 1)
+        self.rank_pushed[fresh_items] = self.rank[fresh_items]
+        np.add.at(self.user_esum, nu, np.abs(nr - self.rank_pushed[ni]))
+        self._append(nu, ni, nr)
+
+        rounds, items_updated, users_updated = self._propagate(np.unique(items), np.unique(users))
+
+        # Re-index once the unindexed tail gets large
+        if self._n - self._n_indexed > 0.1 * self._n_indexed:
+            self._build_index()
+
+        report = {
+            "rounds": rounds,
+            "new_ratings": int(is_new.sum()),
+            "changed_ratings": int(len(changed)),
+            "new_users": n_users - n_users_before,
+            "new_items": n_items - n_items_before,
+            "items_updated": items_updated,
+            "users_updated": users_updated,
+            "seconds": time.perf_counter() - start,
+        }
+        if measure_residual:
+            report["residual"] = self.residual()
+        return report
+
+    # Push ranking / reputation changes outwards until every change is below tol
+    def _propagate(self, dirty_items, dirty_users):
+        items_updated, users_updated = set(), set()
+        rounds = 0
+
+        while (len(dirty_items) or len(dirty_users)) and rounds < self.max_rounds:
+            rounds += 1
+
+            # Items: refresh rankings, push the ones that moved to their raters' errors
+            if len(dirty_items):
+                items_updated.update(dirty_items.tolist())
+                self.rank[dirty_items] = self.item_wsum[dirty_items] / np.maximum(self.item_count[dirty_items], 1)
+                moved = dirty_items[np.abs(self.rank[dirty_items] - self.rank_pushed[dirty_items]) > self.tol]
+                if len(moved):
+                    e = self._entries_of(moved, by_item=True)
+                    eu, ei, er = self._users[e], self._items[e], self._ratings[e]
+                    np.add.at(self.user_esum, eu, np.abs(er - self.rank[ei]) - np.abs(er - self.rank_pushed[ei]))
+                    self.rank_pushed[moved] = self.rank[moved]
+                    dirty_users = np.union1d(dirty_users, eu)
+                dirty_items = dirty_items[:0]
+
+            # Users: refresh reputations, push the ones that moved to the items they rated
+            if len(dirty_users):
+                users_updated.update(dirty_users.tolist())
+                avg_error = self.user_esum[dirty_users] / np.maximum(self.user_count[dirty_users], 1)
+                self.rep[dirty_users] = np.maximum(1 - self.lambda_factor * avg_error, 0)
+                moved = dirty_users[np.abs(self.rep[dirty_users] - self.rep_pushed[dirty_users]) > self.tol]
+                if len(moved):
+                    e = self._entries_of(moved)
+                    eu, ei, er = self._users[e], self._items[e], self._ratings[e]
+                    np.add.at(self.item_wsum, ei, (self.rep[eu] - self.rep_pushed[eu]) * er)
+                    self.rep_pushed[moved] = self.rep[moved]
+                    dirty_items = np.unique(ei)
+                dirty_users = dirty_users[:0]
+
+        return rounds, len(items_updated), len(users_updated)
+
+    # ---- diagnostics and results -------------------------------------------
+
+    def residual(self):
+        """L-infinity change of one full synchronous iteration from the current state."""
+        users, items, ratings = self._entries()
+        n_items, n_users = len(self.item_ids), len(self.user_ids)
+        counts_i = np.maximum(np.bincount(items, minlength=n_items), 1)
+        counts_u = np.maximum(np.bincount(users, minlength=n_users), 1)
+        rank = np.bincount(items, weights=self.rep[users] * ratings, minlength=n_items) / counts_i
+        errors = np.bincount(users, weights=np.abs(ratings - rank[items]), minlength=n_users) / counts_u
+        rep = np.maximum(1 - self.lambda_factor * errors, 0)
+        return float(max(np.abs(rank - self.rank).max(initial=0), np.abs(rep - self.rep).max(initial=0)))
+
+    def full_recompute_diff(self):
+        """Recompute from scratch (reputation 1.0) and return the L-infinity gap to the current rankings."""
+        users, items, ratings = self._entries()
+        matrix = RatingMatrix(self.user_ids, self.item_ids, users, items, ratings)
+        rank, _, _ = bipartite_reputation(matrix, self.lambda_factor, self.tol, self.max_iter)
+        return float(np.abs(rank - self.rank).max(initial=0))
+
+    # Refresh all sums from scratch to flush accumulated floating point drift
+    def refresh(self):
+        self._recompute_sums()
+        self._build_index()
+
+    def item_rankings(self):
+        return dict(zip(self.item_ids, self.rank.tolist()))
+
+    def user_reputation(self):
+        return dict(zip(self.user_ids, self.rep.tolist()))
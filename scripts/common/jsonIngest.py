@@ -0,0 +1,103 @@
+import json
+import multiprocessing as mp
+import os
+
+import numpy as np
+import pandas as pd
+
+# Review fields the rankings use, and the dtype of their column
+REVIEW_FIELDS = {
+    "reviewerID": object,
+    "asin": object,
+    "overall": np.float64,
+    "unixReviewTime": np.int64,
+}
+
+# Parts smaller than this are not worth a separate task
+MIN_PART_BYTES = 4 << 20
+
+
+def byte_ranges(file_path, n_parts):
+    """Split a file into up to n_parts (start, end) byte ranges that begin and end on line boundaries."""
+    size = os.path.getsize(file_path)
+    cuts = [0]
+    with open(file_path, "rb") as f:
+        for k in range(1, n_parts):
+            target = size * k // n_parts
+            if target <= cuts[-1]:
+                continue
+            f.seek(target - 1)
+            f.readline()  # finish the line the target falls in
+            position = f.tell()
+            if cuts[-1] < position < size:
+                cuts.append(position)
+    cuts.append(size)
+    return list(zip(cuts[:-1], cuts[1:]))
+
+
+def _parse_range(task):
+    file_path, start, end, fields = task
+    values = {name: [] for name in fields}
+    seen = {name: False for name in fields}
+    with open(file_path, "rb") as f:
+        f.seek(start)
+        position = start
+        while position < end:
+            line = f.readline()
+            position += len(line)
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            for name in fields:
+                value = record.get(name)
+                if value is not None:
+                    seen[name] = True
+                values[name].append(value)
+    return values, seen
+
+
+def read_json_columns(file_path, fields=REVIEW_FIELDS, n_workers=None):
+    """
+    Column-projected parse of a JSON-lines file.
+
+    The file is split into byte ranges on line boundaries that a process
+    pool parses independently; each worker keeps only the requested fields
+    of every record, so no review object (or its reviewText) outlives its
+    line. Returns {field: array} in file order, with the dtypes of fields
+    (NaN / None where a record lacks the field); fields absent from every
+    record are left out.
+    """
+    if isinstance(fields, (list, tuple)):
+        fields = {name: REVIEW_FIELDS.get(name, np.float64) for name in fields}
+    n_workers = n_workers or mp.cpu_count()
+    n_parts = max(1, min(4 * n_workers, os.path.getsize(file_path) // MIN_PART_BYTES))
+    tasks = [(file_path, start, end, list(fields)) for start, end in byte_ranges(file_path, n_parts)]
+
+    if len(tasks) > 1 and n_workers > 1:
+        with mp.Pool(n_workers) as pool:
+            parts = pool.map(_parse_range, tasks)
+    else:
+        parts = [_parse_range(task) for task in tasks]
+
+    columns = {}
+    for name, dtype in fields.items():
+        if not any(seen[name] for _, seen in parts):
+            continue
+        values = [value for chunk, _ in parts for value in chunk[name]]
+        columns[name] = _column(values, dtype)
+    return columns
+
+
+# Array of one field; numeric fields with missing values fall back to float64 with NaN
+def _column(values, dtype):
+    if dtype is object:
+        return np.array(values, dtype=object)
+    try:
+        return np.array(values, dtype=dtype)
+    except TypeError:
+        return np.array(values, dtype=np.float64)
+
+
+def load_json_dataframe(file_path, fields=REVIEW_FIELDS, n_workers=None):
+    """DataFrame of the projected review columns, in place of pd.DataFrame([json.loads(line) ...])."""
+    return pd.DataFrame(read_json_columns(file_path, fields, n_workers))
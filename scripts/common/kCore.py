@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+
+
+# Row indices of a CSR adjacency grouped by node: rows[ptr[n]:ptr[n + 1]] are node n's rows
+def _adjacency(codes, n_nodes):
+    rows = np.argsort(codes, kind="stable")
+    ptr = np.r_[0, np.cumsum(np.bincount(codes, minlength=n_nodes))]
+    return rows, ptr
+
+
+# Concatenated CSR slices of the given nodes
+def _gather(rows, ptr, nodes):
+    starts, counts = ptr[nodes], ptr[nodes + 1] - ptr[nodes]
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    return rows[np.repeat(starts, counts) + offsets]
+
+
+def k_core_mask(user_codes, item_codes, min_user_ratings=5, min_item_ratings=0):
+    """
+    Rating rows surviving the (min_user_ratings, min_item_ratings) core of the user-item graph.
+
+    Degrees count rating rows (a user who rated a book twice has degree 2,
+    as value_counts counts it). Every user with fewer than min_user_ratings
+    live rows and every item with fewer than min_item_ratings is queued;
+    the queue is drained a frontier at a time: the frontier's live rows are
+    removed, the degrees on the other side are decremented, and the nodes
+    that drop below their threshold form the next frontier. A row is
+    visited once from its user and once from its item, so the total work
+    is O(ratings) whatever the number of rounds, and the result is the
+    unique maximal core the repeated value_counts / isin filter converges
+    to. Rows with a missing user never survive, nor, when items are
+    filtered, rows with a missing item (code -1), like value_counts drops
+    NaN ids.
+    """
+    user_codes = np.asarray(user_codes, dtype=np.int64)
+    item_codes = np.asarray(item_codes, dtype=np.int64)
+    alive = user_codes >= 0
+    if min_item_ratings > 0:
+        alive &= item_codes >= 0
+    n_users = int(user_codes.max()) + 1 if len(user_codes) else 0
+    n_items = int(item_codes.max()) + 1 if len(item_codes) else 0
+    if min_item_ratings <= 0:
+        # Removing a user never changes another user's degree: one pass is the whole core
+        user_degree = np.bincount(user_codes[alive], minlength=n_users)
+        alive[alive] = user_degree[user_codes[alive]] >= min_user_ratings
+        return alive
+
+    # Missing ids go to one extra sentinel node on each side that is never queued
+    users = np.where(user_codes >= 0, user_codes, n_users)
+    items = np.where(item_codes >= 0, item_codes, n_items)
+    user_degree = np.bincount(users[alive], minlength=n_users + 1)
+    item_degree = np.bincount(items[alive], minlength=n_items + 1)
+    user_rows, user_ptr = _adjacency(users, n_users + 1)
+    item_rows, item_ptr = _adjacency(items, n_items + 1)
+
+    user_removed = user_degree < min_user_ratings
+    item_removed = item_degree < min_item_ratings
+    user_removed[n_users] = item_removed[n_items] = True
+    user_frontier = np.nonzero(user_removed[:n_users] & (user_degree[:n_users] > 0))[0]
+    item_frontier = np.nonzero(item_removed[:n_items] & (item_degree[:n_items] > 0))[0]
+
+    while len(user_frontier) or len(item_frontier):
+        rows = np.concatenate([_gather(user_rows, user_ptr, user_frontier),
+                               _gather(item_rows, item_ptr, item_frontier)])
+        rows = np.unique(rows[alive[rows]])
+        alive[rows] = False
+        np.subtract.at(user_degree, users[rows], 1)
+        np.subtract.at(item_degree, items[rows], 1)
+
+        # Only nodes of the removed rows can have dropped below their threshold
+        touched = np.unique(users[rows])
+        user_frontier = touched[~user_removed[touched] & (user_degree[touched] < min_user_ratings)]
+        touched = np.unique(items[rows])
+        item_frontier = touched[~item_removed[touched] & (item_degree[touched] < min_item_ratings)]
+        user_removed[user_frontier] = True
+        item_removed[item_frontier] = True
+    return alive
+
+
+def filter_k_core(df, user_col="User-ID", item_col="ISBN", min_user_ratings=5, min_item_ratings=0):
+    """df restricted to its (min_user_ratings, min_item_ratings) core, rows in their original order."""
+    user_codes, _ = pd.factorize(df[user_col])
+    if min_item_ratings > 0:
+        item_codes, _ = pd.factorize(df[item_col])
+    else:
+        item_codes = np.zeros(len(df), dtype=np.int64)  # items are not filtered: one node for all
+    return df[k_core_mask(user_codes, item_codes, min_user_ratings, min_item_ratings)]
@@ -0,0 +1,140 @@
+import zlib
+
+import networkx as nx
+import numpy as np
+
+
+# Sorted "item:rating" profile string used as compression input, as in the
+# scripts (separator="") and notebooks (separator=" ")
+def profile_string(ratings, separator=""):
+    return "".join([f"{k}:{v}{separator}" for k, v in sorted(ratings.items())])
+
+
+# Profile string of every user, users in dict order; taken from compressed_sizes when
+# profileCache.compute_compressed_sizes built it from these same profiles
+def profile_strings(user_ratings, compressed_sizes=None, separator=""):
+    profiles = getattr(compressed_sizes, "profiles", None)
+    if profiles is not None and compressed_sizes.user_ratings is user_ratings \
+            and compressed_sizes.separator == separator:
+        return profiles
+    return [profile_string(ratings, separator) for ratings in user_ratings.values()]
+
+
+# Compressed size of every user's profile string, users in dict order
+def compressed_size_array(user_ratings, compressed_sizes=None, separator=""):
+    sizes = np.empty(len(user_ratings), dtype=np.int64)
+    for k, u_string in enumerate(profile_strings(user_ratings, compressed_sizes, separator)):
+        if compressed_sizes is not None:
+            sizes[k] = compressed_sizes[u_string]
+        else:
+            sizes[k] = len(zlib.compress(u_string.encode()))
+    return sizes
+
+
+def kolmogorov_radius(threshold):
+    """
+    Largest integer size gap d with 1 / (1 + d) > threshold.
+
+    Compressed sizes are integers, so kolmogorov_similarity > threshold is
+    exactly |c_u - c_v| <= d. The bound is checked with the same float
+    expression as the pairwise measure. Returns None when every pair
+    qualifies (threshold <= 0) and -1 when none does (threshold >= 1).
+    """
+    if threshold <= 0:
+        return None
+    if threshold >= 1:
+        return -1
+    d = int(np.ceil(1 / threshold))
+    while not 1 / (1 + d) > threshold:
+        d -= 1
+    return d
+
+
+def kolmogorov_pairs(sizes, threshold, max_edges=1_000_000):
+    """
+    Stream (u, v, sim) index arrays of all pairs with kolmogorov similarity > threshold.
+
+    Users are sorted by compressed size; the partners of the user at sorted
+    position i are the later positions whose size is within the radius,
+    i.e. a window ending at searchsorted(size + radius). The edges of a run
+    of positions are generated at once with no pairwise test, at most about
+    max_edges per yielded block. Indexes refer to the order of sizes and
+    each pair comes out once with u < v.
+    """
+    sizes = np.asarray(sizes, dtype=np.int64)
+    radius = kolmogorov_radius(threshold)
+    if radius is not None and radius < 0:
+        return
+    order = np.argsort(sizes, kind="stable")
+    sorted_sizes = sizes[order]
+    if radius is None:
+        window_end = np.full(len(sizes), len(sizes))
+    else:
+        window_end = np.searchsorted(sorted_sizes, sorted_sizes + radius, side="right")
+    partners = window_end - np.arange(len(sizes)) - 1
+
+    # Split the sorted positions into runs holding about max_edges partners each
+    cumulative = np.cumsum(partners)
+    total = cumulative[-1] if len(sizes) else 0
+    bounds = np.unique(np.r_[0, np.searchsorted(cumulative, np.arange(max_edges, total, max_edges), side="right"), len(sizes)])
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        after = partners[lo:hi]
+        left = np.repeat(np.arange(lo, hi), after)
+        step = np.arange(len(left)) - np.repeat(np.cumsum(after) - after, after)
+        right = left + 1 + step
+        u, v = order[left], order[right]
+        sim = 1 / (1 + np.abs(sizes[u] - sizes[v]))
+        yield np.minimum(u, v), np.maximum(u, v), sim
+
+
+def kolmogorov_graph(user_ratings, threshold, compressed_sizes=None, separator="", add_all_nodes=False):
+    """
+    compute_similarity_matrix with kolmogorov_similarity, built by the sorted sweep.
+
+    Gives the same edges, weights and node order as the pairwise loop over
+    itertools.combinations: edges are added sorted by the dict position of
+    (u, v).
+    """
+    users = np.array(list(user_ratings.keys()), dtype=object)
+    sizes = compressed_size_array(user_ratings, compressed_sizes, separator)
+    blocks = list(kolmogorov_pairs(sizes, threshold))
+
+    graph = nx.Graph()
+    if add_all_nodes:
+        graph.add_nodes_from(user_ratings.keys())
+    if blocks:
+        u, v, sim = (np.concatenate(parts) for parts in zip(*blocks))
+        order = np.lexsort((v, u))
+        graph.add_weighted_edges_from(zip(users[u[order]].tolist(), users[v[order]].tolist(), sim[order].tolist()))
+    return graph
+
+
+def kolmogorov_components(user_ratings, threshold, compressed_sizes=None, separator="", include_isolated=False):
+    """
+    Connected components of the kolmogorov similarity graph without building it.
+
+    Two users are linked when their compressed sizes differ by at most the
+    radius, so in size order every component is a contiguous run, broken
+    wherever consecutive sizes are further apart than the radius.
+    Matches nx.connected_components on the graph from
+    compute_similarity_matrix: same sets, ordered by their first user in
+    dict order, and users without any edge left out unless
+    include_isolated is set.
+    """
+    users = np.array(list(user_ratings.keys()), dtype=object)
+    sizes = compressed_size_array(user_ratings, compressed_sizes, separator)
+    radius = kolmogorov_radius(threshold)
+    if len(users) == 0:
+        return []
+
+    order = np.argsort(sizes, kind="stable")
+    if radius is None:
+        breaks = np.array([], dtype=np.int64)
+    else:
+        breaks = np.nonzero(np.diff(sizes[order]) > radius)[0] + 1
+    runs = np.split(order, breaks)
+
+    if not include_isolated:
+        runs = [run for run in runs if len(run) > 1]
+    runs.sort(key=lambda run: run.min())
+    return [set(users[run].tolist()) for run in runs]
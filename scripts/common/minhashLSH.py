@@ -0,0 +1,155 @@
+import time
+
+import networkx as nx
+import numpy as np
+
+from similarityEngine import profile_matrix, similarity_graph
+
+# Hash family h(x) = (a x + b) mod p over item codes; p < 2^31 keeps a x + b inside int64
+MERSENNE_PRIME = (1 << 31) - 1
+
+
+# Probability that a pair with Jaccard similarity s shares at least one band
+def collision_probability(s, bands, rows):
+    return 1 - (1 - s ** rows) ** bands
+
+
+def optimal_bands(threshold, num_perm, false_positive_weight=0.5, false_negative_weight=0.5):
+    """
+    Pick (bands, rows) with bands * rows <= num_perm for a Jaccard threshold.
+
+    Minimizes the weighted area of false positives (pairs below threshold
+    that collide) plus false negatives (pairs above threshold that do not).
+    A larger false_negative_weight buys recall with more candidate pairs.
+    """
+    below = np.linspace(0, threshold, 200)
+    above = np.linspace(threshold, 1, 200)
+    best, best_error = (1, num_perm), float("inf")
+    for bands in range(1, num_perm + 1):
+        for rows in range(1, num_perm // bands + 1):
+            false_positive = collision_probability(below, bands, rows).mean() * threshold
+            false_negative = (1 - collision_probability(above, bands, rows)).mean() * (1 - threshold)
+            error = false_positive_weight * false_positive + false_negative_weight * false_negative
+            if error < best_error:
+                best, best_error = (bands, rows), error
+    return best
+
+
+class MinHashLSHIndex:
+    """
+    MinHash signatures of every user's rated-item set with LSH banding.
+
+    Signatures are computed for all users at once: for each hash function
+    the per-user minimum over the CSR row of item codes. Users whose
+    signatures agree on every row of some band land in the same bucket and
+    become candidate pairs; only those pairs get an exact Jaccard check.
+    """
+
+    def __init__(self, user_ratings, threshold, num_perm=128, false_positive_weight=0.5,
+                 false_negative_weight=0.5, seed=1):
+        self.threshold = threshold
+        self.users, matrix = profile_matrix(user_ratings)
+        self.presence = matrix.copy()
+        self.presence.data = np.ones_like(self.presence.data)
+        self.degree = np.diff(matrix.indptr).astype(np.float64)
+        self.bands, self.rows = optimal_bands(threshold, num_perm, false_positive_weight, false_negative_weight)
+
+        rng = np.random.default_rng(seed)
+        n_hashes = self.bands * self.rows
+        a = rng.integers(1, MERSENNE_PRIME, n_hashes, dtype=np.int64)
+        b = rng.integers(0, MERSENNE_PRIME, n_hashes, dtype=np.int64)
+
+        items = matrix.indices.astype(np.int64)
+        starts = matrix.indptr[:-1]
+        self.signatures = np.full((len(self.users), n_hashes), MERSENNE_PRIME, dtype=np.int64)
+        rated = np.diff(matrix.indptr) > 0
+        for k in range(n_hashes):
+            hashed = (a[k] * items + b[k]) % MERSENNE_PRIME
+            if len(hashed):
+                self.signatures[rated, k] = np.minimum.reduceat(hashed, starts[rated])
+
+    def candidate_pairs(self):
+        """Unique (u, v) user index pairs, u < v, sharing at least one LSH bucket."""
+        n = len(self.users)
+        keys = []
+        for band in range(self.bands):
+            block = np.ascontiguousarray(self.signatures[:, band * self.rows:(band + 1) * self.rows])
+            _, bucket, sizes = np.unique(block.view(np.dtype((np.void, block.dtype.itemsize * self.rows))),
+                                         return_inverse=True, return_counts=True)
+            bucket = bucket.ravel()
+            members = np.nonzero(sizes[bucket] > 1)[0]
+            order = members[np.argsort(bucket[members], kind="stable")]
+
+            # All pairs inside each bucket: position p pairs with every later position of its bucket
+            ends = np.cumsum(sizes[bucket[order]][np.r_[True, np.diff(bucket[order]) != 0]])
+            group_end = np.repeat(ends, np.diff(np.r_[0, ends]))
+            after = group_end - np.arange(len(order)) - 1
+            left = np.repeat(np.arange(len(order)), after)
+            step = np.arange(len(left)) - np.repeat(np.cumsum(after) - after, after)
+            right = left + 1 + step
+            first, second = order[left], order[right]
+            keys.append(np.minimum(first, second).astype(np.int64) * n + np.maximum(first, second))
+        if not keys:
+            return np.array([], dtype=np.int64), np.array([], dtype=np.int64)
+        keys = np.unique(np.concatenate(keys))
+        return keys // n, keys % n
+
+    def exact_jaccard(self, u, v, chunk_size=100_000):
+        sims = np.empty(len(u))
+        for start in range(0, len(u), chunk_size):
+            uu, vv = u[start:start + chunk_size], v[start:start + chunk_size]
+            inter = np.asarray(self.presence[uu].multiply(self.presence[vv]).sum(axis=1)).ravel()
+            sims[start:start + chunk_size] = inter / (self.degree[uu] + self.degree[vv] - inter)
+        return sims
+
+    def similar_pairs(self):
+        u, v = self.candidate_pairs()
+        sims = self.exact_jaccard(u, v)
+        keep = sims > self.threshold
+        return u[keep], v[keep], sims[keep], len(u)
+
+
+def lsh_similarity_graph(user_ratings, threshold, num_perm=128, false_positive_weight=0.5,
+                         false_negative_weight=0.5, seed=1, add_all_nodes=False):
+    """
+    Jaccard similarity graph from LSH candidates, like compute_similarity_matrix
+    with jaccard_similarity but without the quadratic scan.
+
+    Every edge has its exact Jaccard weight (no false positives); edges can
+    only be missed, at a rate controlled by num_perm and the false-negative
+    weight (see measure_recall).
+    """
+    index = MinHashLSHIndex(user_ratings, threshold, num_perm, false_positive_weight, false_negative_weight, seed)
+    u, v, sims, _ = index.similar_pairs()
+    users = np.array(index.users, dtype=object)
+
+    graph = nx.Graph()
+    if add_all_nodes:
+        graph.add_nodes_from(user_ratings.keys())
+    graph.add_weighted_edges_from(zip(users[u].tolist(), users[v].tolist(), sims.tolist()))
+    return graph
+
+
+def measure_recall(user_ratings, threshold, **lsh_options):
+    """Compare the LSH graph with the exact blocked Jaccard graph: recall, sizes and timings."""
+    start = time.perf_counter()
+    exact = similarity_graph(user_ratings, "jaccard", threshold)
+    exact_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    index = MinHashLSHIndex(user_ratings, threshold, **lsh_options)
+    u, v, _, n_candidates = index.similar_pairs()
+    lsh_seconds = time.perf_counter() - start
+
+    found = {frozenset((index.users[a], index.users[b])) for a, b in zip(u.tolist(), v.tolist())}
+    expected = {frozenset(edge) for edge in exact.edges()}
+    return {
+        "bands": index.bands,
+        "rows": index.rows,
+        "candidates": n_candidates,
+        "exact_edges": len(expected),
+        "lsh_edges": len(found),
+        "recall": len(found & expected) / len(expected) if expected else 1.0,
+        "exact_seconds": exact_seconds,
+        "lsh_seconds": lsh_seconds,
+    }
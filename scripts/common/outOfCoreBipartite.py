@@ -0,0 +1,169 @@
+import json
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from fixedPoint import fixed_point
+
+# On-disk layout of a converted ratings file
+USER_FILE = "user_code.bin"
+ITEM_FILE = "item_code.bin"
+RATING_FILE = "rating.bin"
+META_FILE = "meta.json"
+IDS_FILE = "ids.pkl"
+
+CODE_DTYPE = np.int32
+RATING_DTYPE = np.float64
+
+
+# Read a ratings file in bounded chunks as (user ids, item ids, ratings)
+def read_rating_chunks(file_path, fmt="movielens", chunk_size=1_000_000, columns=None):
+    if fmt == "movielens":
+        # "::" splits into empty fields with a single ":" separator, which lets the C parser
+        # be used; field k of the record is column 2k
+        fields = columns or (0, 1, 4)
+        usecols = [2 * k for k in fields]
+        reader = pd.read_csv(file_path, sep=":", header=None, usecols=usecols, chunksize=chunk_size)
+        names = usecols
+    elif fmt == "tsv":
+        names = list(columns or ("user_id", "item_id", "normalized_rating"))
+        reader = pd.read_csv(file_path, sep="\t", header=0, usecols=names, chunksize=chunk_size)
+    elif fmt == "json":
+        names = list(columns or ("reviewerID", "asin", "normalizedOverall"))
+        # No dtype inference: it runs per chunk, so an asin like "0001234567" could become an int in one
+        # chunk and stay a string in the next
+        reader = pd.read_json(file_path, lines=True, chunksize=chunk_size, dtype=False)
+    else:
+        raise ValueError(f"Unknown ratings format: {fmt}")
+
+    for chunk in reader:
+        yield chunk[names[0]].to_numpy(), chunk[names[1]].to_numpy(), chunk[names[2]].to_numpy(dtype=np.float64)
+
+
+# Map raw ids to dense codes, extending `index` / `ids` with ids seen for the first time;
+# a missing id is an id of its own (indexed under None, as NaN never equals itself)
+def encode_ids(raw_ids, index, ids):
+    local_codes, uniques = pd.factorize(raw_ids, use_na_sentinel=False)
+    lookup = np.empty(len(uniques), dtype=np.int64)
+    for k, raw in enumerate(uniques.tolist()):
+        key = None if pd.isna(raw) else raw
+        code = index.get(key)
+        if code is None:
+            code = len(ids)
+            index[key] = code
+            ids.append(raw)
+        lookup[k] = code
+    return lookup[local_codes]
+
+
+def convert_ratings(file_path, out_dir, fmt="movielens", chunk_size=1_000_000, columns=None):
+    """
+    Convert a ratings file into flat (user_code, item_code, rating) arrays on disk.
+
+    The file is read chunk by chunk, so only one chunk and the id maps are
+    ever held in memory. Returns the number of ratings written.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    user_index, item_index = {}, {}
+    user_ids, item_ids = [], []
+    n = 0
+
+    with open(os.path.join(out_dir, USER_FILE), "wb") as fu, \
+            open(os.path.join(out_dir, ITEM_FILE), "wb") as fi, \
+            open(os.path.join(out_dir, RATING_FILE), "wb") as fr:
+        for users, items, ratings in read_rating_chunks(file_path, fmt, chunk_size, columns):
+            encode_ids(users, user_index, user_ids).astype(CODE_DTYPE).tofile(fu)
+            encode_ids(items, item_index, item_ids).astype(CODE_DTYPE).tofile(fi)
+            ratings.astype(RATING_DTYPE).tofile(fr)
+            n += len(ratings)
+
+    with open(os.path.join(out_dir, META_FILE), "w") as f:
+        json.dump({"n_ratings": n, "n_users": len(user_ids), "n_items": len(item_ids)}, f)
+    with open(os.path.join(out_dir, IDS_FILE), "wb") as f:
+        pickle.dump({"user_ids": user_ids, "item_ids": item_ids}, f)
+
+    return n
+
+
+class MemmapRatings:
+    """Read-only, memory-mapped view of a directory written by convert_ratings."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, META_FILE)) as f:
+            meta = json.load(f)
+        self.n_ratings = meta["n_ratings"]
+        self.n_users = meta["n_users"]
+        self.n_items = meta["n_items"]
+
+        shape = (self.n_ratings,)
+        self.user_codes = np.memmap(os.path.join(directory, USER_FILE), dtype=CODE_DTYPE, mode="r", shape=shape)
+        self.item_codes = np.memmap(os.path.join(directory, ITEM_FILE), dtype=CODE_DTYPE, mode="r", shape=shape)
+        self.ratings = np.memmap(os.path.join(directory, RATING_FILE), dtype=RATING_DTYPE, mode="r", shape=shape)
+
+    def ids(self):
+        with open(os.path.join(self.directory, IDS_FILE), "rb") as f:
+            ids = pickle.load(f)
+        return ids["user_ids"], ids["item_ids"]
+
+    def chunks(self, chunk_size=1_000_000):
+        for start in range(0, self.n_ratings, chunk_size):
+            stop = min(start + chunk_size, self.n_ratings)
+            yield self.user_codes[start:stop], self.item_codes[start:stop], self.ratings[start:stop]
+
+
+def out_of_core_bipartite_ranking(directory, lambda_factor=0.3, tol=1e-6, max_iter=100,
+                                  chunk_size=1_000_000, acceleration=None):
+    """
+    Bipartite reputation ranking streamed over memory-mapped rating arrays.
+
+    Every half-iteration is one sequential pass over the files in chunks of
+    chunk_size ratings; only per-user and per-item vectors live in RAM.
+    With U users, I items and C = chunk_size, the heap peak is roughly
+
+        8 * (3U + 7I) + 32 * C bytes                     (plain / "aitken")
+        8 * (3U + 7I + 2 * (memory + 1) * I) + 32 * C    ("anderson", memory=5)
+
+    i.e. counts, sums and state per user and item, the fixed-point driver's
+    vectors, and four float64 temporaries per chunk. It does not depend on
+    the number of ratings; the mapped file pages are page cache the OS can
+    drop at any time.
+
+    Returns (item_rankings, user_reputation, trace) with the same dicts as
+    sparse_bipartite_ranking.
+    """
+    ratings = MemmapRatings(directory)
+    n_users, n_items = ratings.n_users, ratings.n_items
+
+    # One pass for the degree of every user and item
+    user_counts = np.zeros(n_users)
+    item_counts = np.zeros(n_items)
+    for users, items, _ in ratings.chunks(chunk_size):
+        user_counts += np.bincount(users, minlength=n_users)
+        item_counts += np.bincount(items, minlength=n_items)
+    user_counts = np.maximum(user_counts, 1)
+    item_counts = np.maximum(item_counts, 1)
+
+    def item_pass(user_reputation):
+        weighted_sum = np.zeros(n_items)
+        for users, items, r in ratings.chunks(chunk_size):
+            weighted_sum += np.bincount(items, weights=user_reputation[users] * r, minlength=n_items)
+        return weighted_sum / item_counts
+
+    def user_pass(item_rankings):
+        error_sum = np.zeros(n_users)
+        for users, items, r in ratings.chunks(chunk_size):
+            error_sum += np.bincount(users, weights=np.abs(r - item_rankings[items]), minlength=n_users)
+        return np.maximum(1 - lambda_factor * error_sum / user_counts, 0)
+
+    def step(item_rankings):
+        return item_pass(user_pass(item_rankings))
+
+    initial_rankings = item_pass(np.ones(n_users))
+    item_rankings, trace = fixed_point(step, initial_rankings, tol, max_iter, acceleration)
+    user_reputation = user_pass(item_rankings)
+
+    user_ids, item_ids = ratings.ids()
+    return dict(zip(item_ids, item_rankings.tolist())), dict(zip(user_ids, user_reputation.tolist())), trace
@@ -0,0 +1,211 @@
+import multiprocessing as mp
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from fixedPoint import fixed_point
+from sharding import balanced_shards
+from sparseBipartite import bipartite_fixed_point
+
+
+class SharedArrays:
+    """Named numpy arrays, each backed by its own SharedMemory block."""
+
+    def __init__(self):
+        self.blocks = {}
+        self.arrays = {}
+
+    def create(self, name, array):
+        array = np.ascontiguousarray(array)
+        block = SharedMemory(create=True, size=max(array.nbytes, 1))
+        view = np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)
+        view[:] = array
+        self.blocks[name] = block
+        self.arrays[name] = view
+        return view
+
+    # Picklable description used by workers to attach to the same blocks
+    def spec(self):
+        return {name: (self.blocks[name].name, view.shape, view.dtype.str) for name, view in self.arrays.items()}
+
+    @classmethod
+    def attach(cls, spec):
+        shared = cls()
+        for name, (block_name, shape, dtype) in spec.items():
+            block = SharedMemory(name=block_name)
+            shared.blocks[name] = block
+            shared.arrays[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+        return shared
+
+    def close(self, unlink=False):
+        self.arrays = {}
+        for block in self.blocks.values():
+            block.close()
+            if unlink:
+                block.unlink()
+        self.blocks = {}
+
+
+# Item rankings for items lo..hi-1 from the shared user reputations
+def _item_shard(a, lo, hi):
+    ptr = a["item_ptr"]
+    start, stop = ptr[lo], ptr[hi]
+    counts = np.diff(ptr[lo:hi + 1])
+    rows = np.repeat(np.arange(hi - lo), counts)
+    weighted_sum = np.bincount(rows, weights=a["rep"][a["item_users"][start:stop]] * a["item_ratings"][start:stop],
+                               minlength=hi - lo)
+    a["rank"][lo:hi] = weighted_sum / np.maximum(counts, 1)
+
+
+# User reputations for users lo..hi-1 from the shared item rankings
+def _user_shard(a, lo, hi, lambda_factor):
+    ptr = a["user_ptr"]
+    start, stop = ptr[lo], ptr[hi]
+    counts = np.diff(ptr[lo:hi + 1])
+    rows = np.repeat(np.arange(hi - lo), counts)
+    rating_errors = np.abs(a["user_ratings"][start:stop] - a["rank"][a["user_items"][start:stop]])
+    avg_error = np.bincount(rows, weights=rating_errors, minlength=hi - lo) / np.maximum(counts, 1)
+    a["rep"][lo:hi] = np.maximum(1 - lambda_factor * avg_error, 0)
+
+
+# Commands a worker runs per message: the user half, the item half, or both
+# (a full iteration, the halves separated by a barrier across the workers)
+USERS, ITEMS, STEP = "users", "items", "step"
+
+
+def _worker_loop(spec, user_bounds, item_bounds, lambda_factor, barrier, conn):
+    shared = SharedArrays.attach(spec)
+    a = shared.arrays
+    try:
+        while True:
+            command = conn.recv()
+            if command is None:
+                break
+            try:
+                if command in (USERS, STEP):
+                    _user_shard(a, *user_bounds, lambda_factor)
+                if command == STEP:
+                    barrier.wait()
+                if command in (ITEMS, STEP):
+                    _item_shard(a, *item_bounds)
+            except Exception as error:
+                barrier.abort()  # release the workers waiting for this one
+                conn.send(error)
+            else:
+                conn.send(None)
+    finally:
+        shared.close()
+
+
+class ParallelBipartiteRanker:
+    """
+    Bipartite reputation iteration sharded over persistent worker processes.
+
+    The rating arrays of a RatingMatrix (grouped by item and by user) and
+    the reputation / ranking vectors are placed in shared memory once.
+    Every worker owns one nnz-balanced user shard and one item shard for
+    the whole run and writes its slice of the shared vectors in place. A
+    full iteration is one message to each worker: it updates its users,
+    waits on a barrier until every reputation is written, then updates its
+    items and replies, so the parent synchronizes once per iteration
+    rather than once per half. Nothing but the command is pickled.
+
+    With n_workers == 1 there is nothing to shard and run() is
+    sparseBipartite.bipartite_fixed_point in the calling process.
+
+    Scaling of a fixed 20-iteration run on a 1M-rating ml-1m-shaped matrix
+    (benchmarkParallel.py, best of 3, against bipartite_fixed_point at 0.28 s):
+
+        cores  workers  time     vs serial
+        1      1        0.25 s   1.12x (serial fast path, same code)
+        1      2        0.43 s   0.66x
+        1      3        0.50 s   0.56x
+
+    The machine measured had a single core, so these rows only show the
+    synchronization overhead; the multi-core rows still have to be taken
+    on a machine with more cores (python benchmarkParallel.py <max workers>).
+
+    Use as a context manager (or call close()) so the workers and shared
+    blocks are released.
+    """
+
+    def __init__(self, matrix, n_workers=None, lambda_factor=0.3):
+        self.matrix = matrix
+        self.lambda_factor = lambda_factor
+        self.n_workers = n_workers or mp.cpu_count()
+        self.workers, self.conns, self.shared = [], [], None
+        if self.n_workers == 1:
+            return
+
+        self.shared = SharedArrays()
+        self.shared.create("item_ptr", matrix.item_matrix.indptr.astype(np.int64))
+        self.shared.create("item_users", matrix.item_matrix.indices)
+        self.shared.create("item_ratings", matrix.item_matrix.data)
+        self.shared.create("user_ptr", matrix.user_matrix.indptr.astype(np.int64))
+        self.shared.create("user_items", matrix.user_matrix.indices)
+        self.shared.create("user_ratings", matrix.user_matrix.data)
+        self.rep = self.shared.create("rep", np.ones(matrix.n_users))
+        self.rank = self.shared.create("rank", np.zeros(matrix.n_items))
+
+        # One shard of each kind per worker; workers left without rows get empty ranges
+        item_shards = balanced_shards(matrix.item_matrix.indptr, self.n_workers)
+        user_shards = balanced_shards(matrix.user_matrix.indptr, self.n_workers)
+        item_shards += [(0, 0)] * (self.n_workers - len(item_shards))
+        user_shards += [(0, 0)] * (self.n_workers - len(user_shards))
+
+        barrier = mp.Barrier(self.n_workers)
+        spec = self.shared.spec()
+        for user_bounds, item_bounds in zip(user_shards, item_shards):
+            parent_conn, child_conn = mp.Pipe()
+            worker = mp.Process(target=_worker_loop, daemon=True,
+                                args=(spec, user_bounds, item_bounds, lambda_factor, barrier, child_conn))
+            worker.start()
+            self.workers.append(worker)
+            self.conns.append(parent_conn)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        for conn in self.conns:
+            conn.send(None)
+        for worker in self.workers:
+            worker.join()
+        self.workers, self.conns = [], []
+        if self.shared is not None:
+            self.rep = self.rank = None
+            self.shared.close(unlink=True)
+            self.shared = None
+
+    def _broadcast(self, command):
+        for conn in self.conns:
+            conn.send(command)
+        errors = [error for error in (conn.recv() for conn in self.conns) if error is not None]
+        if errors:
+            raise errors[0]
+
+    def run(self, tol=1e-6, max_iter=100, acceleration=None):
+        """
+        Iterate to the fixed point with the fixed-point driver.
+
+        Returns (item_rankings, user_reputation, trace) as code-indexed
+        arrays, like bipartite_fixed_point.
+        """
+        if not self.workers:
+            return bipartite_fixed_point(self.matrix, self.lambda_factor, tol, max_iter, acceleration)
+
+        def step(item_rankings):
+            self.rank[:] = item_rankings
+            self._broadcast(STEP)
+            return self.rank.copy()
+
+        self.rep[:] = 1.0
+        self._broadcast(ITEMS)
+        item_rankings, trace = fixed_point(step, self.rank.copy(), tol, max_iter, acceleration)
+
+        self.rank[:] = item_rankings
+        self._broadcast(USERS)
+        return item_rankings, self.rep.copy(), trace
@@ -0,0 +1,127 @@
+import hashlib
+import multiprocessing as mp
+import os
+import pickle
+import zlib
+from collections import OrderedDict
+
+from kolmogorovGraph import profile_string
+
+# Default cache file, as declared by the multipartite scripts
+CACHE_FILE = "compressed_sizes.pkl"
+
+# Below this many misses compressing in the parent is faster than starting a pool
+MIN_PARALLEL = 2000
+
+
+def profile_key(u_string):
+    return hashlib.blake2b(u_string.encode(), digest_size=16).digest()
+
+
+def _compressed_size(u_string):
+    return len(zlib.compress(u_string.encode()))
+
+
+class CompressedSizeCache:
+    """
+    zlib sizes of profile strings, persisted on disk and keyed by a hash of the profile.
+
+    Entries are kept in least-recently-used order: every lookup or insert
+    moves the entry to the end, and once more than max_entries are stored
+    the oldest ones are dropped. The file is only rewritten when entries
+    were added or evicted; a run that hit every entry leaves it untouched,
+    recency included. A profile that did not change between runs hashes to
+    the same key, so its size is never recomputed whatever the threshold or
+    measure of the run.
+    """
+
+    def __init__(self, path=CACHE_FILE, max_entries=1_000_000):
+        self.path = path
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.dirty = False
+        if path is not None and os.path.exists(path):
+            with open(path, "rb") as f:
+                self.entries = pickle.load(f)
+            self.evict()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        size = self.entries.get(key)
+        if size is not None:
+            self.entries.move_to_end(key)
+        return size
+
+    def put(self, key, size):
+        self.entries[key] = size
+        self.entries.move_to_end(key)
+        self.dirty = True
+        self.evict()
+
+    def evict(self):
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.dirty = True
+
+    def sizes(self, profiles, n_workers=None):
+        """Compressed size of every profile string; misses are compressed across a process pool."""
+        keys = [profile_key(u_string) for u_string in profiles]
+        sizes = [self.get(key) for key in keys]
+
+        missing = [k for k, size in enumerate(sizes) if size is None]
+        strings = [profiles[k] for k in missing]
+        n_workers = n_workers or mp.cpu_count()
+        if len(strings) >= MIN_PARALLEL and n_workers > 1:
+            with mp.Pool(n_workers) as pool:
+                computed = pool.map(_compressed_size, strings, chunksize=max(1, len(strings) // (4 * n_workers)))
+        else:
+            computed = [_compressed_size(u_string) for u_string in strings]
+
+        for k, size in zip(missing, computed):
+            sizes[k] = size
+            self.put(keys[k], size)
+        return sizes
+
+    def save(self):
+        if self.path is None or not self.dirty:
+            return
+        # Write to a temporary file first so an interrupted run never leaves a truncated cache
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(self.entries, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+
+
+class ProfileSizes(dict):
+    """
+    {profile string: zlib size} that also keeps every user's profile string.
+
+    profiles lists the strings of user_ratings in dict order, so
+    kolmogorovGraph.profile_strings hands them to the similarity kernels
+    instead of serializing each profile again.
+    """
+
+    def __init__(self, sizes, user_ratings, profiles, separator):
+        super().__init__(sizes)
+        self.user_ratings = user_ratings
+        self.profiles = profiles
+        self.separator = separator
+
+
+def compute_compressed_sizes(user_ratings, cache_file=CACHE_FILE, separator="", max_entries=1_000_000, n_workers=None):
+    """
+    {profile string: zlib size} for every user, as the similarity measures expect.
+
+    Each user's sorted profile is serialized once; sizes come from the
+    on-disk cache when the profile was seen before and are compressed in
+    parallel otherwise, and the strings are kept in the returned
+    ProfileSizes for the kernels. Pass cache_file=None to skip persistence.
+    """
+    profiles = [profile_string(ratings, separator) for ratings in user_ratings.values()]
+    cache = CompressedSizeCache(cache_file, max_entries)
+    sizes = cache.sizes(profiles, n_workers)
+    cache.save()
+    return ProfileSizes(zip(profiles, sizes), user_ratings, profiles, separator)
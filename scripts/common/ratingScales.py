@@ -0,0 +1,72 @@
+import numpy as np
+
+# Normalization schemes on rating levels: name -> f(levels, r_min, r_max)
+SCHEMES = {
+    # r / r_max (movielens_normalized.py, r / 5)
+    "divide_max": lambda levels, r_min, r_max: levels / r_max,
+    # (r - r_min) / (r_max - r_min) (the spammer notebook, (r - 1) / (max - 1))
+    "min_max": lambda levels, r_min, r_max: (levels - r_min) / (r_max - r_min),
+    # (r - r_min + 1) / (r_max - r_min + 1) (the normalizeRatings.py scripts)
+    "shifted": lambda levels, r_min, r_max: (levels - r_min + 1) / (r_max - r_min + 1),
+}
+
+# Datasets with more distinct rating values than this keep float ratings
+MAX_LEVELS = 256
+CODE_DTYPE = np.uint8
+
+
+def rating_codes(ratings):
+    """
+    (codes, levels) of a rating column: levels are the sorted distinct
+    ratings and codes the uint8 index of every rating in levels, so
+    levels[codes] gives the ratings back exactly. Missing ratings share
+    one NaN level, sorted last. Returns None when there are more than
+    MAX_LEVELS distinct values.
+    """
+    levels, codes = np.unique(np.asarray(ratings, dtype=np.float64), return_inverse=True)
+    if len(levels) > MAX_LEVELS:
+        return None
+    return codes.ravel().astype(CODE_DTYPE), levels
+
+
+class RatingScale:
+    """
+    Normalized views of integer rating codes.
+
+    A scheme is evaluated once on the few rating levels into a lookup
+    table, and a normalized column is one gather table[codes] done when a
+    ranking asks for it, so the dataset is stored once and every scheme
+    (or another r_min / r_max) costs a pass over one-byte codes instead of
+    a normalized copy of the file. r_min and r_max default to the lowest
+    and highest rating in the data; missing ratings are a NaN level, which
+    every scheme maps to NaN without touching the bounds.
+    """
+
+    def __init__(self, codes, levels, r_min=None, r_max=None):
+        self.codes = codes
+        self.levels = np.asarray(levels, dtype=np.float64)
+        rated = self.levels[~np.isnan(self.levels)]
+        self.r_min = rated.min() if r_min is None and len(rated) else r_min
+        self.r_max = rated.max() if r_max is None and len(rated) else r_max
+        self._tables = {}
+
+    @classmethod
+    def from_ratings(cls, ratings, r_min=None, r_max=None):
+        coded = rating_codes(ratings)
+        if coded is None:
+            raise ValueError(f"More than {MAX_LEVELS} distinct ratings, they cannot be coded")
+        return cls(*coded, r_min=r_min, r_max=r_max)
+
+    def table(self, scheme):
+        """Normalized value of every rating level under scheme."""
+        if scheme not in self._tables:
+            if scheme not in SCHEMES:
+                raise ValueError(f"Unknown normalization scheme: {scheme}")
+            self._tables[scheme] = SCHEMES[scheme](self.levels, self.r_min, self.r_max)
+        return self._tables[scheme]
+
+    def ratings(self):
+        return self.levels[self.codes]
+
+    def normalized(self, scheme):
+        return self.table(scheme)[self.codes]
@@ -0,0 +1,11 @@
+import numpy as np
+
+
+# Split the rows of a CSR pointer array into n_shards contiguous ranges
+# (lo, hi) holding roughly the same number of entries; empty ranges are dropped
+def balanced_shards(ptr, n_shards):
+    targets = np.linspace(0, ptr[-1], n_shards + 1)
+    cuts = np.unique(np.searchsorted(ptr, targets, side="left"))
+    cuts[0], cuts[-1] = 0, len(ptr) - 1
+    cuts = np.unique(cuts)
+    return [(int(lo), int(hi)) for lo, hi in zip(cuts[:-1], cuts[1:]) if hi > lo]
@@ -0,0 +1,182 @@
+import math
+
+import networkx as nx
+import numpy as np
+
+from userProfiles import UserProfiles
+
+
+# Pairwise reference measures, as in the multipartite scripts and notebooks
+def linear_similarity(ratings_u, ratings_v):
+    common_items = set(ratings_u.keys()).intersection(set(ratings_v.keys()))
+    if not common_items:
+        return 0
+    diff_sum = sum(abs(ratings_u[i] - ratings_v[i]) for i in common_items)
+    return max(0, 1 - diff_sum / (len(common_items) * 1.0))
+
+
+def jaccard_similarity(ratings_u, ratings_v):
+    items_u = set(ratings_u.keys())
+    items_v = set(ratings_v.keys())
+    union = items_u.union(items_v)
+    if not union:
+        return 0
+    return len(items_u.intersection(items_v)) / len(union)
+
+
+def cosine_similarity(ratings_u, ratings_v):
+    common_items = set(ratings_u.keys()).intersection(set(ratings_v.keys()))
+    if not common_items:
+        return 0
+    dot_product = sum(ratings_u[i] * ratings_v[i] for i in common_items)
+    magnitude_u = math.sqrt(sum(ratings_u[i] ** 2 for i in ratings_u))
+    magnitude_v = math.sqrt(sum(ratings_v[i] ** 2 for i in ratings_v))
+    if magnitude_u == 0 or magnitude_v == 0:
+        return 0
+    return dot_product / (magnitude_u * magnitude_v)
+
+
+MEASURES = {
+    "linear": linear_similarity,
+    "jaccard": jaccard_similarity,
+    "cosine": cosine_similarity,
+}
+
+# Pairs whose vectorized similarity lands this close to the threshold are
+# recomputed with the reference measure, so rounding never flips an edge
+BORDERLINE = 1e-9
+
+
+# Sparse user x item rating matrix from {user: {item: rating}} (or a UserProfiles), users in dict order
+def profile_matrix(user_ratings):
+    profiles = UserProfiles.from_user_ratings(user_ratings)
+    return profiles.users.ids.tolist(), profiles.matrix()
+
+
+class PairwiseKernel:
+    """
+    Vectorized linear / jaccard / cosine similarities for blocks of users.
+
+    All measures are built from sparse products of the rating matrix R and
+    the presence matrix P:
+
+      co-rated items     P P^T
+      jaccard            P P^T / (n_u + n_v - P P^T)
+      cosine             R R^T / (|r_u| |r_v|)
+      linear             1 - sum_common |r_u - r_v| / |common|, where the
+                         absolute differences come from
+                         |a - b| = a + b - 2 min(a, b) and min(a, b) is
+                         decomposed over the sorted rating levels
+                         (sum_k (l_k - l_k-1) [a >= l_k][b >= l_k]),
+                         i.e. one P_k P_k^T product per distinct level.
+    """
+
+    def __init__(self, matrix, measure):
+        if measure not in MEASURES:
+            raise ValueError(f"Unknown similarity measure: {measure}")
+        self.measure = measure
+        self.R = matrix.tocsr()
+        self.P = self.R.copy()
+        self.P.data = np.ones_like(self.P.data)
+        self.PT = self.P.T.tocsr()
+        self.degree = np.diff(self.R.indptr).astype(np.float64)
+
+        if measure == "cosine":
+            self.RT = self.R.T.tocsr()
+            self.norm = np.sqrt(np.asarray(self.R.multiply(self.R).sum(axis=1)).ravel())
+        elif measure == "linear":
+            self.RT = self.R.T.tocsr()
+            levels = np.unique(self.R.data)
+            self.base_level = levels[0] if len(levels) else 0.0
+            # (step, indicator of ratings >= level) for every level above the lowest one
+            self.level_steps = []
+            for previous, level in zip(levels[:-1], levels[1:]):
+                above = self.R.copy()
+                above.data = (above.data >= level).astype(np.float64)
+                above.eliminate_zeros()
+                self.level_steps.append((level - previous, above, above.T.tocsr()))
+
+    def block(self, lo, hi):
+        """
+        Similarities between users lo..hi-1 and every user v > u.
+
+        Returns (u, v, sim) arrays for pairs with at least one co-rated item
+        (for jaccard and cosine every other pair has similarity 0; linear
+        returns 0 for them too).
+        """
+        co = (self.P[lo:hi] @ self.PT).tocoo()
+        u = co.row.astype(np.int64) + lo
+        v = co.col.astype(np.int64)
+        upper = v > u
+        u, v, common = u[upper], v[upper], co.data[upper]
+        if len(u) == 0:
+            return u, v, common
+        keys = (u - lo) * self.R.shape[0] + v
+
+        if self.measure == "jaccard":
+            sim = common / (self.degree[u] + self.degree[v] - common)
+        elif self.measure == "cosine":
+            dot = self._pair_values(self.R[lo:hi] @ self.RT, keys)
+            denom = self.norm[u] * self.norm[v]
+            sim = np.where(denom > 0, dot / np.where(denom > 0, denom, 1), 0)
+        else:
+            sum_u = self._pair_values(self.R[lo:hi] @ self.PT, keys)
+            sum_v = self._pair_values(self.P[lo:hi] @ self.RT, keys)
+            min_sum = self.base_level * common
+            for step, above, above_T in self.level_steps:
+                min_sum = min_sum + step * self._pair_values(above[lo:hi] @ above_T, keys)
+            diff_sum = sum_u + sum_v - 2 * min_sum
+            sim = np.maximum(0, 1 - diff_sum / common)
+        return u, v, sim
+
+    # Values of a (hi-lo) x n_users sparse product at the pairs given as row-major keys
+    @staticmethod
+    def _pair_values(product, keys):
+        product = product.tocsr()
+        product.sum_duplicates()  # canonical form: sorted column indices per row
+        rows = np.repeat(np.arange(product.shape[0]), np.diff(product.indptr))
+        product_keys = rows * product.shape[1] + product.indices
+        if len(product_keys) == 0:
+            return np.zeros(len(keys))
+        pos = np.minimum(np.searchsorted(product_keys, keys), len(product_keys) - 1)
+        return np.where(product_keys[pos] == keys, product.data[pos], 0)
+
+
+def similar_pairs(user_ratings, measure, threshold, tile_size=512):
+    """
+    Stream (u, v, sim) arrays of all user pairs with sim > threshold.
+
+    Users are processed in tiles of tile_size rows against all later users
+    (the same u < v pairs as itertools.combinations), so the sparse products
+    of one tile hold at most tile_size x n_users values whatever the size of
+    the dataset. Pairs that fall within BORDERLINE of the threshold are
+    recomputed with the reference pairwise measure. Yields raw user ids.
+    Assumes threshold >= 0 (pairs without co-rated items are never emitted).
+    """
+    users, matrix = profile_matrix(user_ratings)
+    kernel = PairwiseKernel(matrix, measure)
+    reference = MEASURES[measure]
+    users = np.array(users, dtype=object)
+
+    for lo in range(0, len(users), tile_size):
+        hi = min(lo + tile_size, len(users))
+        u, v, sim = kernel.block(lo, hi)
+
+        borderline = np.nonzero(np.abs(sim - threshold) <= BORDERLINE)[0]
+        for k in borderline:
+            sim[k] = reference(user_ratings[users[u[k]]], user_ratings[users[v[k]]])
+
+        keep = sim > threshold
+        u, v, sim = u[keep], v[keep], sim[keep]
+        order = np.lexsort((v, u))
+        yield users[u[order]], users[v[order]], sim[order]
+
+
+def similarity_graph(user_ratings, measure, threshold, tile_size=512, add_all_nodes=False):
+    """Blocked replacement for compute_similarity_matrix returning the same networkx graph."""
+    graph = nx.Graph()
+    if add_all_nodes:
+        graph.add_nodes_from(user_ratings.keys())
+    for u, v, sim in similar_pairs(user_ratings, measure, threshold, tile_size):
+        graph.add_weighted_edges_from(zip(u.tolist(), v.tolist(), sim.tolist()))
+    return graph
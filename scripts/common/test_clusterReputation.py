@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+
+from clusterReputation import cluster_reputation_ranking
+
+
+# reputation_based_ranking of the multipartite scripts for a fixed number of iterations
+def loop_ranking(df, user_groups, iterations, lambda_factor=0.3):
+    item_rankings = {item: 0.5 for item in df["item_id"].unique()}
+    user_reputation = {user: 1.0 for user in df["user_id"].unique()}
+    for _ in range(iterations):
+        cluster_rankings = {}
+        for group in user_groups:
+            group_df = df[df["user_id"].isin(list(group))]
+            for item, group_item in group_df.groupby("item_id"):
+                users = group_item["user_id"].values
+                weighted_sum = sum(user_reputation[u] * r for u, r in zip(users, group_item["normalized_rating"].values))
+                total_weight = sum(user_reputation[u] for u in users)
+                cluster_rankings.setdefault(item, {})[frozenset(group)] = (
+                    weighted_sum / total_weight if total_weight > 0 else None)
+
+        for item in item_rankings:
+            assigned = False
+            for group in user_groups:
+                if frozenset(group) in cluster_rankings.get(item, {}):
+                    item_rankings[item] = cluster_rankings[item][frozenset(group)]
+                    assigned = True
+                    break
+            if not assigned:
+                for other_item in cluster_rankings:
+                    for cluster in cluster_rankings[other_item]:
+                        if cluster_rankings[other_item][cluster] is not None:
+                            item_rankings[item] = cluster_rankings[other_item][cluster]
+                            break
+
+        for user in df["user_id"].unique():
+            user_ratings = df[df["user_id"] == user]
+            errors = [abs(r - item_rankings[i]) for i, r in
+                      zip(user_ratings["item_id"].values, user_ratings["normalized_rating"].values)]
+            user_reputation[user] = max(1 - lambda_factor * sum(errors) / len(errors), 0)
+    return item_rankings
+
+
+def test_matches_the_multipartite_loop():
+    rng = np.random.default_rng(2)
+    df = pd.DataFrame({
+        "user_id": rng.integers(0, 20, 200),
+        "item_id": rng.integers(0, 30, 200),
+        "normalized_rating": rng.integers(1, 6, 200) / 5,
+    })
+    # Users 16..19 are in no cluster, so the items only they rated inherit a ranking
+    user_groups = [set(range(0, 6)), set(range(6, 16))]
+
+    for iterations in (1, 4):
+        ranking, _ = cluster_reputation_ranking(df, user_groups, tol=-1, max_iter=iterations - 1)
+        expected = loop_ranking(df, user_groups, iterations)
+        assert list(ranking) == list(expected)
+        assert np.allclose(list(ranking.values()), list(expected.values()))
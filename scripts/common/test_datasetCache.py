@@ -0,0 +1,37 @@
+import numpy as np
+
+from datasetCache import is_fresh, load_dataset
+
+
+def write_udata(path, rows):
+    with open(path, "w") as f:
+        f.writelines("\t".join("" if v is None else str(v) for v in row) + "\n" for row in rows)
+
+
+def test_missing_ratings_keep_the_valid_bounds(tmp_path):
+    path = str(tmp_path / "u.data")
+    write_udata(path, [(1, 10, 1, 100), (2, 10, 3, 101), (3, 11, 5, 102), (4, 11, None, 103)])
+    dataset = load_dataset(path, "udata")
+    df = dataset.to_dataframe({"user": "user_id", "item": "item_id", "divide_max": "normalized_rating"})
+    assert np.allclose(df["normalized_rating"][:3], [0.2, 0.6, 1.0])
+    assert np.isnan(df["normalized_rating"][3])
+    # The cache is reopened from meta.json, NaN level included
+    scale = load_dataset(path, "udata").scale()
+    codes, table = scale.codes, scale.table("divide_max")
+    assert np.isnan(table[codes[3]]) and np.allclose(table[codes[:3]], [0.2, 0.6, 1.0])
+
+
+def test_missing_ids_are_not_the_last_id(tmp_path):
+    path = str(tmp_path / "u.data")
+    write_udata(path, [(1, 10, 4, 100), (None, 11, 3, 101), (2, None, 5, 102)])
+    df = load_dataset(path, "udata").to_dataframe({"user": "user_id", "item": "item_id"})
+    assert np.isnan(df["user_id"][1]) and df["item_id"][1] == 11
+    assert np.isnan(df["item_id"][2]) and df["user_id"][2] == 2
+
+
+def test_cache_of_another_format_is_stale(tmp_path):
+    path = str(tmp_path / "u.data")
+    write_udata(path, [(1, 10, 4, 100), (2, 11, 3, 101)])
+    dataset = load_dataset(path, "udata")
+    assert is_fresh(path, dataset.cache_dir, "udata")
+    assert not is_fresh(path, dataset.cache_dir, "tsv")
@@ -0,0 +1,18 @@
+import numpy as np
+
+from externalSort import external_sort
+
+
+def test_matches_sorted(tmp_path):
+    rng = np.random.default_rng(4)
+    lines = [f"{u}::{i}::{r}::{t}\n" for u, i, r, t in zip(rng.integers(1, 50, 3000), rng.integers(1, 400, 3000),
+                                                          rng.integers(1, 6, 3000), rng.integers(0, 100, 3000))]
+    input_file = tmp_path / "ratings.dat"
+    input_file.write_text("".join(lines))
+
+    for key, fields in (("item", [1]), (("user", "timestamp"), [0, 3])):
+        output_file = tmp_path / "sorted.dat"
+        # A few KB per run, so the merge sees many runs
+        external_sort(str(input_file), str(output_file), key, memory_bytes=20_000, tmp_dir=str(tmp_path))
+        expected = sorted(lines, key=lambda line: [int(line.split("::")[k]) for k in fields])
+        assert output_file.read_text() == "".join(expected)
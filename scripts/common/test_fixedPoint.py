@@ -0,0 +1,26 @@
+import numpy as np
+import pytest
+
+from fixedPoint import fixed_point
+
+
+def test_unknown_acceleration_is_rejected_before_the_first_step():
+    calls = []
+
+    def step(x):
+        calls.append(x)
+        return x
+
+    with pytest.raises(ValueError, match="aitkn"):
+        fixed_point(step, np.zeros(3), acceleration="aitkn")
+    assert calls == []
+
+
+def test_accelerations_reach_the_same_fixed_point():
+    def step(x):
+        return 0.5 * x + 1
+
+    for acceleration in (None, "aitken", "anderson"):
+        x, trace = fixed_point(step, np.zeros(4), tol=1e-10, max_iter=200, acceleration=acceleration)
+        assert np.allclose(x, 2, atol=1e-8)
+        assert trace[-1].residual <= 1e-10
@@ -0,0 +1,28 @@
+import numpy as np
+import pandas as pd
+
+from kCore import filter_k_core
+
+
+# Repeated value_counts / isin filter of shortenDataset.py, on both sides
+def loop_k_core(df, min_user_ratings, min_item_ratings):
+    while True:
+        user_counts = df["User-ID"].value_counts()
+        item_counts = df["ISBN"].value_counts()
+        kept = df[df["User-ID"].isin(user_counts[user_counts >= min_user_ratings].index)
+                  & df["ISBN"].isin(item_counts[item_counts >= min_item_ratings].index)]
+        if len(kept) == len(df):
+            return df
+        df = kept
+
+
+def test_matches_the_value_counts_filter():
+    rng = np.random.default_rng(3)
+    df = pd.DataFrame({
+        "User-ID": rng.zipf(1.6, 2000) % 300,
+        "ISBN": rng.zipf(1.4, 2000) % 500,
+    })
+    for min_user_ratings, min_item_ratings in ((5, 0), (5, 3), (3, 10)):
+        expected = loop_k_core(df, min_user_ratings, min_item_ratings)
+        assert filter_k_core(df, min_user_ratings=min_user_ratings,
+                             min_item_ratings=min_item_ratings).index.tolist() == expected.index.tolist()
@@ -0,0 +1,25 @@
+import numpy as np
+
+from ratingScales import RatingScale, rating_codes
+
+
+def test_missing_ratings_are_their_own_level():
+    codes, levels = rating_codes([3, np.nan, 1, 5, np.nan])
+    assert np.array_equal(levels[:3], [1, 3, 5])
+    assert len(levels) == 4 and np.isnan(levels[3])
+    assert np.array_equal(codes, [1, 3, 0, 2, 3])
+
+
+def test_missing_ratings_do_not_change_the_bounds():
+    scale = RatingScale.from_ratings([1, 3, 5, np.nan])
+    assert (scale.r_min, scale.r_max) == (1, 5)
+    assert np.allclose(scale.normalized("divide_max")[:3], [0.2, 0.6, 1.0])
+    assert np.allclose(scale.normalized("min_max")[:3], [0.0, 0.5, 1.0])
+    assert np.allclose(scale.normalized("shifted")[:3], [0.2, 0.6, 1.0])
+    assert np.isnan(scale.normalized("divide_max")[3])
+
+
+def test_all_missing_ratings():
+    scale = RatingScale.from_ratings([np.nan, np.nan])
+    assert scale.r_min is None and scale.r_max is None
+    assert np.isnan(scale.ratings()).all()
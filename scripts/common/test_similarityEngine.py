@@ -0,0 +1,26 @@
+from itertools import combinations
+
+import numpy as np
+
+from similarityEngine import MEASURES, similarity_graph
+
+
+def test_matches_all_pairs():
+    rng = np.random.default_rng(5)
+    user_ratings = {
+        user: dict(zip(rng.choice(40, size=rng.integers(1, 12), replace=False).tolist(),
+                       (rng.integers(1, 6, 12) / 5).tolist()))
+        for user in range(60)
+    }
+    for measure, similarity in MEASURES.items():
+        # compute_similarity_matrix of the scripts
+        expected = {}
+        for u, v in combinations(user_ratings, 2):
+            sim = similarity(user_ratings[u], user_ratings[v])
+            if sim > 0.3:
+                expected[u, v] = sim
+
+        graph = similarity_graph(user_ratings, measure, 0.3, tile_size=16)
+        edges = {(min(u, v), max(u, v)): w for u, v, w in graph.edges(data="weight")}
+        assert edges.keys() == expected.keys()
+        assert np.allclose([edges[pair] for pair in expected], list(expected.values()))
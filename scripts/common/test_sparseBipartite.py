@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+
+from sparseBipartite import (
+    RatingMatrix, bipartite_fixed_point, bipartite_lambda_sweep, bipartite_reputation, sparse_lambda_sweep,
+)
+
+
+def test_rows_with_missing_ids_are_dropped():
+    df = pd.DataFrame({
+        "user_id": [1, 1, 2, np.nan, 3],
+        "item_id": ["a", "b", "a", "b", None],
+        "normalized_rating": [0.2, 0.4, 0.6, 0.8, 1.0],
+    })
+    matrix = RatingMatrix.from_dataframe(df)
+    assert matrix.user_ids.tolist() == [1, 2]
+    assert matrix.item_ids.tolist() == ["a", "b"]
+    assert np.allclose(matrix.ratings, [0.2, 0.4, 0.6])
+
+    complete = RatingMatrix.from_dataframe(df.dropna())
+    item_rankings, user_reputation, _ = bipartite_reputation(matrix)
+    expected_rankings, expected_reputation, _ = bipartite_reputation(complete)
+    assert np.allclose(item_rankings, expected_rankings)
+    assert np.allclose(user_reputation, expected_reputation)
+
+
+def test_lambda_sweep_blocks_match_single_runs():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "user_id": rng.integers(0, 30, 400),
+        "item_id": rng.integers(0, 20, 400),
+        "normalized_rating": rng.random(400),
+    })
+    lambdas = np.linspace(0.1, 0.9, 5)
+    matrix = RatingMatrix.from_dataframe(df)
+    blocked = bipartite_lambda_sweep(matrix, lambdas, block_size=2)
+    for k, lambda_factor in enumerate(lambdas):
+        item_rankings, user_reputation, trace = bipartite_fixed_point(matrix, lambda_factor)
+        assert np.allclose(blocked[0][:, k], item_rankings, atol=1e-6)
+        assert blocked[2][k] == len(trace)
+
+    results = sparse_lambda_sweep(df, lambdas)
+    assert all(type(key) is float for key in results)
+
+
+def test_matches_the_dataframe_loop():
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame({
+        "user_id": rng.integers(0, 25, 300),
+        "item_id": rng.integers(0, 15, 300),
+        "normalized_rating": rng.integers(1, 6, 300) / 5,
+    })
+
+    # bipartite_ranking_algorithm of the scripts, with the convergence check left out
+    user_reputation = {user: 1.0 for user in df["user_id"].unique()}
+    for _ in range(3):
+        expected = {}
+        for item in df["item_id"].unique():
+            item_ratings = df[df["item_id"] == item]
+            weighted_sum = sum(user_reputation[u] * r for u, r in
+                               zip(item_ratings["user_id"], item_ratings["normalized_rating"]))
+            expected[item] = weighted_sum / len(item_ratings)
+        for user in df["user_id"].unique():
+            user_ratings = df[df["user_id"] == user]
+            errors = [abs(r - expected[i]) for i, r in zip(user_ratings["item_id"], user_ratings["normalized_rating"])]
+            user_reputation[user] = max(1 - 0.3 * sum(errors) / len(errors), 0)
+
+    matrix = RatingMatrix.from_dataframe(df)
+    item_rankings, reputation, _ = bipartite_reputation(matrix, tol=-1, max_iter=3)
+    assert matrix.item_ids.tolist() == list(expected)
+    assert np.allclose(item_rankings, list(expected.values()))
+    assert np.allclose(reputation, [user_reputation[u] for u in matrix.user_ids])
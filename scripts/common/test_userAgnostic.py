@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+
+from userAgnostic import (
+    UserAgnosticRanker, coded_user_agnostic_ranking, histogram_user_agnostic_ranking, segmented_user_agnostic_ranking,
+)
+
+
+def test_missing_ratings_rank_nan():
+    df = pd.DataFrame({
+        "item_id": [1, 1, 2, 2, 2, 3, 3],
+        "normalized_rating": [0.2, 0.4, 0.2, np.nan, 1.0, 0.6, 0.8],
+    })
+    for ranking in (histogram_user_agnostic_ranking(df), segmented_user_agnostic_ranking(df)):
+        assert np.isclose(ranking[1], 0.3)
+        assert np.isnan(ranking[2])
+        assert np.isclose(ranking[3], 0.7)
+
+
+def test_missing_rating_in_first_item():
+    df = pd.DataFrame({"item_id": [1, 1, 2, 2], "normalized_rating": [np.nan, 0.4, 0.2, 0.6]})
+    ranking = histogram_user_agnostic_ranking(df)
+    assert np.isnan(ranking[1])
+    assert np.isclose(ranking[2], 0.4)
+
+
+# user_agnostic_ranking of the scripts: per-item iterative filter
+def loop_ranking(df):
+    item_rankings = {}
+    for item, ratings in df.groupby("item_id")["normalized_rating"]:
+        ratings = list(ratings)
+        converged = False
+        while not converged:
+            mean = np.mean(ratings)
+            std = np.std(ratings) if len(ratings) > 1 else 0
+            new_ratings = [r for r in ratings if (r - mean) ** 2 <= std]
+            converged = len(new_ratings) == len(ratings)
+            ratings = new_ratings
+        item_rankings[item] = np.mean(ratings)
+    return item_rankings
+
+
+def test_engines_match_the_per_item_loop():
+    rng = np.random.default_rng(6)
+    df = pd.DataFrame({"item_id": rng.integers(0, 50, 2000), "normalized_rating": rng.integers(1, 6, 2000) / 5})
+    expected = loop_ranking(df)
+
+    item_codes, item_ids = pd.factorize(df["item_id"])
+    rating_codes, table = pd.factorize(df["normalized_rating"])
+    ranker = UserAgnosticRanker.from_dataframe(df)
+    rankings = [
+        segmented_user_agnostic_ranking(df),
+        histogram_user_agnostic_ranking(df),
+        coded_user_agnostic_ranking(item_codes, item_ids, rating_codes, table),
+        {item: ranker.rankings()[item] for item in expected},
+    ]
+    for ranking in rankings:
+        assert list(ranking) == list(expected)
+        assert np.allclose(list(ranking.values()), list(expected.values()), equal_nan=True)
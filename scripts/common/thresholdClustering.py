@@ -0,0 +1,193 @@
+import json
+import os
+import pickle
+
+import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components, minimum_spanning_tree
+
+from similarityEngine import MEASURES, similar_pairs
+
+# On-disk layout of a sorted edge array
+EDGE_U_FILE = "edge_u.bin"
+EDGE_V_FILE = "edge_v.bin"
+EDGE_WEIGHT_FILE = "edge_weight.bin"
+EDGE_META_FILE = "edges.json"
+USERS_FILE = "users.pkl"
+
+INDEX_DTYPE = np.int32
+WEIGHT_DTYPE = np.float64
+
+
+def similarity_edges(user_ratings, measure, floor, compressed_sizes=None):
+    """
+    Stream (u, v, sim) blocks of raw user ids for every pair with sim > floor.
+
+    measure is one of the similarityEngine measures ("linear", "jaccard",
+    "cosine"), "kolmogorov" or "compression".
+    """
+    if measure in MEASURES:
+        yield from similar_pairs(user_ratings, measure, floor)
+    elif measure == "kolmogorov":
+        from kolmogorovGraph import compressed_size_array, kolmogorov_pairs
+        users = np.array(list(user_ratings.keys()), dtype=object)
+        for u, v, sim in kolmogorov_pairs(compressed_size_array(user_ratings, compressed_sizes), floor):
+            yield users[u], users[v], sim
+    elif measure == "compression":
+        from compressionKernel import compression_pairs
+        for u, v, sim in compression_pairs(user_ratings, floor, compressed_sizes):
+            yield [u], [v], [sim]
+    else:
+        raise ValueError(f"Unknown similarity measure: {measure}")
+
+
+def save_edges(directory, users, pairs):
+    """
+    Write the edges from a stream of (u, v, sim) raw-id blocks as a sorted edge array.
+
+    Edges are stored as flat user index / weight files sorted by descending
+    weight (ties keep the order they were produced in); users is the list
+    of all users, in the order that defines their indexes.
+    """
+    os.makedirs(directory, exist_ok=True)
+    index = {user: k for k, user in enumerate(users)}
+    u_parts, v_parts, w_parts = [], [], []
+    for u, v, sim in pairs:
+        u_parts.append(np.array([index[user] for user in u], dtype=INDEX_DTYPE))
+        v_parts.append(np.array([index[user] for user in v], dtype=INDEX_DTYPE))
+        w_parts.append(np.asarray(sim, dtype=WEIGHT_DTYPE))
+
+    u = np.concatenate(u_parts) if u_parts else np.array([], dtype=INDEX_DTYPE)
+    v = np.concatenate(v_parts) if v_parts else np.array([], dtype=INDEX_DTYPE)
+    w = np.concatenate(w_parts) if w_parts else np.array([], dtype=WEIGHT_DTYPE)
+    order = np.argsort(-w, kind="stable")
+    u[order].tofile(os.path.join(directory, EDGE_U_FILE))
+    v[order].tofile(os.path.join(directory, EDGE_V_FILE))
+    w[order].tofile(os.path.join(directory, EDGE_WEIGHT_FILE))
+
+    with open(os.path.join(directory, EDGE_META_FILE), "w") as f:
+        json.dump({"n_edges": len(w), "n_users": len(users)}, f)
+    with open(os.path.join(directory, USERS_FILE), "wb") as f:
+        pickle.dump(list(users), f)
+    return len(w)
+
+
+class SimilarityDendrogram:
+    """
+    Single-linkage dendrogram of a similarity graph, for clustering at any threshold.
+
+    The edges (computed once above a floor) are reduced to a maximum
+    spanning forest: connected components of the graph restricted to
+    sim > t are exactly the components of the forest edges with weight > t,
+    so the forest merges in descending-weight order form the dendrogram.
+    clusters(t) joins the prefix of merges above t, which takes O(users)
+    whatever the number of original edges, and never builds a networkx
+    graph.
+    """
+
+    def __init__(self, users, u, v, weights, floor=None):
+        self.users = np.array(list(users), dtype=object)
+        self.floor = floor
+        n = len(self.users)
+
+        # Spanning forest on dense descending-weight ranks: exact order, no zero weights
+        _, ranks = np.unique(-np.asarray(weights), return_inverse=True)
+        graph = coo_matrix((ranks.ravel() + 1.0, (u, v)), shape=(n, n)).tocsr()
+        forest = minimum_spanning_tree(graph).tocoo()
+
+        # Look the original weight back up through the rank of each forest edge
+        level_weights = np.sort(np.unique(np.asarray(weights)))[::-1]
+        merge_weights = level_weights[forest.data.astype(np.int64) - 1]
+        order = np.argsort(-merge_weights, kind="stable")
+        self.merge_u = forest.row[order].astype(np.int64)
+        self.merge_v = forest.col[order].astype(np.int64)
+        self.merge_weights = merge_weights[order]
+
+        # Users with at least one edge at the floor; the others are never in the graph
+        self.first_weight = np.full(n, -np.inf)
+        np.maximum.at(self.first_weight, self.merge_u, self.merge_weights)
+        np.maximum.at(self.first_weight, self.merge_v, self.merge_weights)
+
+    @classmethod
+    def load(cls, directory):
+        with open(os.path.join(directory, EDGE_META_FILE)) as f:
+            meta = json.load(f)
+        with open(os.path.join(directory, USERS_FILE), "rb") as f:
+            users = pickle.load(f)
+        n_edges = meta["n_edges"]
+        u = np.memmap(os.path.join(directory, EDGE_U_FILE), dtype=INDEX_DTYPE, mode="r", shape=(n_edges,))
+        v = np.memmap(os.path.join(directory, EDGE_V_FILE), dtype=INDEX_DTYPE, mode="r", shape=(n_edges,))
+        w = np.memmap(os.path.join(directory, EDGE_WEIGHT_FILE), dtype=WEIGHT_DTYPE, mode="r", shape=(n_edges,))
+        return cls(users, u, v, w, meta.get("floor"))
+
+    @classmethod
+    def build(cls, directory, user_ratings, measure, floor, compressed_sizes=None):
+        """Compute all similarities above floor once, store the sorted edge array and load it."""
+        save_edges(directory, list(user_ratings.keys()), similarity_edges(user_ratings, measure, floor, compressed_sizes))
+        meta_path = os.path.join(directory, EDGE_META_FILE)
+        with open(meta_path) as f:
+            meta = json.load(f)
+        meta.update({"measure": measure, "floor": floor})
+        with open(meta_path, "w") as f:
+            json.dump(meta, f)
+        return cls.load(directory)
+
+    def labels(self, threshold):
+        """Component label of every user for the graph with sim > threshold."""
+        if self.floor is not None and threshold < self.floor:
+            raise ValueError(f"Threshold {threshold} is below the floor {self.floor} the edges were computed at")
+        n = len(self.users)
+        k = np.searchsorted(-self.merge_weights, -threshold, side="left")
+        graph = coo_matrix((np.ones(k), (self.merge_u[:k], self.merge_v[:k])), shape=(n, n))
+        _, labels = connected_components(graph, directed=False)
+        return labels
+
+    def clusters(self, threshold, include_isolated=False):
+        """
+        Same groups as detect_groups on compute_similarity_matrix at this threshold.
+
+        Clusters come in the order of nx.connected_components (by their
+        first user in user order); users without an edge above the
+        threshold are left out unless include_isolated is set, as when the
+        graph was built with every user added as a node.
+        """
+        labels = self.labels(threshold)
+        keep = np.arange(len(self.users)) if include_isolated else np.nonzero(self.first_weight > threshold)[0]
+        # connected_components numbers components by their lowest user index
+        order = keep[np.argsort(labels[keep], kind="stable")]
+        cuts = np.nonzero(np.diff(labels[order]))[0] + 1
+        return [set(self.users[group].tolist()) for group in np.split(order, cuts) if len(group)]
+
+    def sweep(self, thresholds, include_isolated=False):
+        return {threshold: self.clusters(threshold, include_isolated) for threshold in thresholds}
+
+    def cluster_counts(self, thresholds, include_isolated=True):
+        """Number of clusters at each threshold, from the merge weights alone."""
+        counts = []
+        for threshold in thresholds:
+            merges = np.searchsorted(-self.merge_weights, -threshold, side="left")
+            if include_isolated:
+                counts.append(len(self.users) - merges)
+            else:
+                counts.append(int((self.first_weight > threshold).sum()) - merges)
+        return counts
+
+
+def complementary_groups(clusters, min_cluster_size):
+    """
+    The notebooks' detect_groups(min_cluster_size) rule on precomputed clusters.
+
+    Clusters smaller than min_cluster_size are pooled into one
+    complementary cluster appended at the end. Returns (groups,
+    complementary cluster).
+    """
+    complementary_cluster = set()
+    filtered_clusters = []
+    for cluster in clusters:
+        if len(cluster) < min_cluster_size:
+            complementary_cluster.update(cluster)
+        else:
+            filtered_clusters.append(cluster)
+    if complementary_cluster:
+        filtered_clusters.append(complementary_cluster)
+    return filtered_clusters, complementary_cluster
@@ -0,0 +1,410 @@
+import numpy as np
+import pandas as pd
+
+from userProfiles import ClusterKeyedRatings
+
+
+def segmented_filter(item_codes, ratings, n_items):
+    """
+    Run the user-agnostic (r - mu)^2 <= sigma filter for every item at once.
+
+    Each pass computes the mean and population standard deviation of every
+    still-active item with segmented sums (bincount over the item codes, so
+    the flat arrays need no sorting) and drops the ratings that fail the
+    test.
+    Items that lost no rating in a pass have reached their fixed point and
+    are taken out of the working arrays, so later passes only touch the
+    items that are still changing.
+
+    This is the general path for ratings with many distinct values (about
+    12x the per-item loop on 1M ratings: every pass streams the active
+    ratings through four bincounts). Cached datasets with coded ratings go
+    through coded_user_agnostic_ranking instead, about 100x the loop.
+
+    Returns (sums, counts) of the surviving ratings per item code.
+    """
+    seg = np.asarray(item_codes)
+    r = np.asarray(ratings, dtype=np.float64)
+
+    sums = np.zeros(n_items)
+    counts = np.zeros(n_items)
+    active = np.ones(n_items, dtype=bool)
+
+    while len(seg):
+        count = np.bincount(seg, minlength=n_items).astype(np.float64)
+        total = np.bincount(seg, weights=r, minlength=n_items)
+        mean = total / np.maximum(count, 1)
+        deviation = r - mean[seg]
+        squared = deviation ** 2
+        variance = np.bincount(seg, weights=squared, minlength=n_items) / np.maximum(count, 1)
+        sigma = np.where(count > 1, np.sqrt(variance), 0)
+
+        keep = squared <= sigma[seg]
+        removed = np.bincount(seg, weights=~keep, minlength=n_items) > 0
+
+        # Items that kept every rating are done: store their final sums
+        done = active & ~removed
+        sums[done] = total[done]
+        counts[done] = count[done]
+        active &= removed
+
+        still_active = active[seg] & keep
+        seg, r = seg[still_active], r[still_active]
+
+    # Items whose every rating was filtered out end with no ratings (mean is NaN, as in np.mean([]))
+    sums[active] = 0
+    counts[active] = 0
+    return sums, counts
+
+
+def segmented_user_agnostic_ranking(df, item_col="item_id", rating_col="normalized_rating"):
+    """
+    Vectorized user_agnostic_ranking on an already loaded DataFrame.
+
+    Gives the same filtered ratings and {item: ranking} dict (same key
+    order as df.groupby(item_col)) as the per-item loop; the final means
+    can only differ by floating-point summation order from np.mean.
+    """
+    item_codes, item_ids = pd.factorize(df[item_col], sort=True)
+    rated = item_codes >= 0  # groupby drops missing item ids
+    ratings = df[rating_col].to_numpy(dtype=np.float64)
+    sums, counts = segmented_filter(item_codes[rated], ratings[rated], len(item_ids))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rankings = sums / counts
+    return dict(zip(np.asarray(item_ids).tolist(), rankings.tolist()))
+
+
+# Items x levels matrix counting how often each item received each distinct rating value;
+# missing (NaN) ratings have no level and are not counted
+def level_histograms(item_codes, ratings, n_items, max_levels=32):
+    level_codes, levels = pd.factorize(np.asarray(ratings, dtype=np.float64))
+    if len(levels) > max_levels:
+        return None, None
+    valid = level_codes >= 0
+    counts = np.bincount(np.asarray(item_codes)[valid] * len(levels) + level_codes[valid],
+                         minlength=n_items * len(levels))
+    return levels, counts.reshape(n_items, len(levels)).astype(np.float64)
+
+
+def histogram_filter(levels, counts):
+    """
+    Run the user-agnostic filter on an items x levels count matrix.
+
+    All ratings of an item that share a level pass or fail the
+    (r - mu)^2 <= sigma test together, so a pass only needs the per-level
+    counts: mean and population standard deviation come from count-weighted
+    sums over the (small) level axis, and a failing level has its count
+    zeroed. Cost and memory are O(items x levels) per pass, independent of
+    how many ratings each item has.
+
+    Returns (filtered counts, rankings); items left without ratings rank NaN.
+    """
+    counts = counts.copy()
+    rankings = np.full(len(counts), np.nan)
+    active = np.arange(len(counts))
+
+    while len(active):
+        c = counts[active]
+        n = c.sum(axis=1)
+        mean = (c @ levels) / np.maximum(n, 1)
+        squared = (levels[None, :] - mean[:, None]) ** 2
+        variance = (c * squared).sum(axis=1) / np.maximum(n, 1)
+        sigma = np.where(n > 1, np.sqrt(variance), 0)
+
+        failing = (squared > sigma[:, None]) & (c > 0)
+        removed = failing.any(axis=1)
+
+        done = active[~removed]
+        rankings[done] = np.where(n[~removed] > 0, mean[~removed], np.nan)
+
+        c[failing] = 0
+        counts[active] = c
+        active = active[removed]
+
+    return counts, rankings
+
+
+def histogram_user_agnostic_ranking(df, item_col="item_id", rating_col="normalized_rating", max_levels=32):
+    """
+    user_agnostic_ranking for discrete rating scales, run on per-item level counts.
+
+    MovieLens and Amazon ratings take five normalized values and BookCrossing
+    eleven, so the filter only needs an items x levels count matrix built in
+    one pass. Falls back to the segmented path when the ratings take more
+    than max_levels distinct values. An item with a missing rating ranks
+    NaN, as np.mean / np.std make it in the per-item loop.
+    """
+    item_codes, item_ids = pd.factorize(df[item_col], sort=True)
+    rated = item_codes >= 0  # groupby drops missing item ids
+    ratings = df[rating_col].to_numpy(dtype=np.float64)[rated]
+
+    levels, counts = level_histograms(item_codes[rated], ratings, len(item_ids), max_levels)
+    if levels is None:
+        return segmented_user_agnostic_ranking(df, item_col, rating_col)
+
+    _, rankings = histogram_filter(levels, counts)
+    rankings[np.unique(item_codes[rated][np.isnan(ratings)])] = np.nan
+    return dict(zip(np.asarray(item_ids).tolist(), rankings.tolist()))
+
+
+def coded_user_agnostic_ranking(item_codes, item_ids, rating_codes, table):
+    """
+    user_agnostic_ranking straight from coded columns, as datasetCache stores them.
+
+    item_codes index item_ids and rating_codes index table, the
+    (normalized) value of every rating level, so the items x levels count
+    matrix is one bincount over the two code columns: no id hashing, no
+    rating factorization and no normalized float64 column. Levels that
+    normalize to NaN are missing ratings, whose items rank NaN as in the
+    per-item loop. Returns the {item: ranking} dict of df.groupby(item)
+    order (sorted ids, missing ids left out).
+    """
+    item_ids = np.asarray(item_ids)
+    table = np.asarray(table, dtype=np.float64)
+    n_items, n_levels = len(item_ids), len(table)
+    cells = np.asarray(item_codes, dtype=np.int64) * n_levels + np.asarray(rating_codes)
+    counts = np.bincount(cells, minlength=n_items * n_levels).reshape(n_items, n_levels).astype(np.float64)
+
+    missing = np.isnan(table)
+    _, rankings = histogram_filter(table[~missing], counts[:, ~missing])
+    rankings[counts[:, missing].sum(axis=1) > 0] = np.nan
+
+    present = np.nonzero(~pd.isna(item_ids))[0]
+    order = present[np.argsort(item_ids[present], kind="stable")]
+    return dict(zip(item_ids[order].tolist(), rankings[order].tolist()))
+
+
+def dataset_user_agnostic_ranking(dataset, scheme, r_min=None, r_max=None):
+    """
+    coded_user_agnostic_ranking of a datasetCache.ColumnarDataset, ratings normalized by a ratingScales scheme.
+
+    The scheme is applied to the rating-level table only; r_min / r_max
+    default to the data's lowest / highest rating.
+    """
+    scale = dataset.scale(r_min, r_max)
+    _, item_ids = dataset.ids()
+    return coded_user_agnostic_ranking(dataset["item"], item_ids, scale.codes, scale.table(scheme))
+
+
+# Raw item ids as a flat object array (tuples and mixed types stay single ids)
+def _as_objects(items):
+    values = np.empty(len(items), dtype=object)
+    values[:] = list(items)
+    return values
+
+
+class UserAgnosticRanker:
+    """
+    Long-lived user-agnostic ranking fed by a stream of ratings.
+
+    Keeps one rating-level histogram per item (the same representation as
+    histogram_filter) and the current ranking of every item. Each call to
+    add / add_batch / remove_batch re-runs the fixed-point filter only for
+    the items whose histogram changed, so ranking(item) is a lookup and
+    rankings() is a single pass over the items, without rereading any file.
+    """
+
+    def __init__(self, levels=(), capacity=1024):
+        self.items = pd.Index([], dtype=object)
+        self.levels = np.array(levels, dtype=np.float64)
+        self.counts = np.zeros((capacity, len(self.levels)))
+        self.current = np.full(capacity, np.nan)
+
+    @classmethod
+    def from_dataframe(cls, df, item_col="item_id", rating_col="normalized_rating"):
+        ranker = cls()
+        ranker.add_batch(df[item_col].to_numpy(dtype=object), df[rating_col].to_numpy(dtype=np.float64))
+        return ranker
+
+    @staticmethod
+    def _interned(index, values):
+        """(index extended by the values it lacks, in order of first appearance, codes of values)."""
+        codes = index.get_indexer(values)
+        new = codes < 0
+        if new.any():
+            index = index.append(pd.Index(pd.unique(values[new]), dtype=index.dtype))
+            codes[new] = index.get_indexer(values[new])
+        return index, codes
+
+    def _item_codes(self, items):
+        self.items, codes = self._interned(self.items, items)
+
+        # Grow the item axis by doubling
+        if len(self.items) > len(self.counts):
+            capacity = max(len(self.items), 2 * len(self.counts))
+            counts = np.zeros((capacity, len(self.levels)))
+            counts[:len(self.counts)] = self.counts
+            current = np.full(capacity, np.nan)
+            current[:len(self.current)] = self.current
+            self.counts, self.current = counts, current
+        return codes
+
+    def _level_codes(self, ratings):
+        levels, codes = self._interned(pd.Index(self.levels), ratings)
+        if len(levels) > len(self.levels):
+            # Rating values never seen before add level columns
+            added = len(levels) - len(self.levels)
+            self.levels = levels.to_numpy(dtype=np.float64)
+            self.counts = np.hstack((self.counts, np.zeros((len(self.counts), added))))
+        return codes
+
+    @staticmethod
+    def _known_codes(index, values, what):
+        codes = index.get_indexer(values)
+        if (codes < 0).any():
+            raise ValueError(f"Cannot retract a rating of unknown {what}: {values[np.argmax(codes < 0)]}")
+        return codes
+
+    def _update(self, item_codes, level_codes, sign):
+        np.add.at(self.counts, (item_codes, level_codes), sign)
+
+        # Re-run the filter only for the items whose histogram changed
+        changed = np.unique(item_codes)
+        _, self.current[changed] = histogram_filter(self.levels, self.counts[changed])
+        return len(changed)
+
+    def add(self, item, rating):
+        return self.add_batch([item], [rating])
+
+    def add_batch(self, items, ratings):
+        """
+        Add a micro-batch of (item, rating) pairs; returns how many items were re-filtered.
+
+        Raises ValueError, leaving the ranker unchanged, on a missing (NaN)
+        rating: it has no level, and the per-item loop would rank its item
+        NaN for good.
+        """
+        ratings = np.asarray(ratings, dtype=np.float64)
+        if np.isnan(ratings).any():
+            raise ValueError(f"Cannot add a missing rating (item {_as_objects(items)[np.argmax(np.isnan(ratings))]})")
+        item_codes = self._item_codes(_as_objects(items))
+        return self._update(item_codes, self._level_codes(ratings), 1)
+
+    def remove_batch(self, items, ratings):
+        """
+        Retract previously added ratings (e.g. the old value of a changed rating).
+
+        Raises ValueError, leaving the ranker unchanged, when an item or a
+        rating value was never added or when an (item, rating) pair would be
+        retracted more often than it was added.
+        """
+        ratings = np.asarray(ratings, dtype=np.float64)
+        item_codes = self._known_codes(self.items, _as_objects(items), "item")
+        level_codes = self._known_codes(pd.Index(self.levels), ratings, "rating value")
+        cells, retracted = np.unique(item_codes * len(self.levels) + level_codes, return_counts=True)
+        held = self.counts.reshape(-1)[cells]
+        if (held < retracted).any():
+            k = int(np.argmax(held < retracted))
+            item, level = divmod(int(cells[k]), len(self.levels))
+            raise ValueError(f"Cannot retract {retracted[k]} ratings {self.levels[level]} of item "
+                             f"{self.items[item]}: only {int(held[k])} were added")
+        return self._update(item_codes, level_codes, -1)
+
+    def ranking(self, item):
+        code = self.items.get_indexer([item])[0]
+        return float(self.current[code]) if code >= 0 else float("nan")
+
+    def rankings(self):
+        """{item: ranking} for every item seen so far, in order of first appearance."""
+        return dict(zip(self.items.tolist(), self.current[:len(self.items)].tolist()))
+
+
+# Window edges this close to a rating could be flipped by summation-order rounding;
+# such segments are refined with the scalar reference arithmetic instead
+WINDOW_BORDERLINE = 1e-9
+
+
+# One segment refined like the notebooks' loop (pandas mean = numpy sum / count)
+def _refine_segment(values, initial, threshold, tol):
+    previous, current = None, initial
+    filtered = 0
+    while previous is None or abs(current - previous) > tol:
+        previous = current
+        valid = values[(values >= current - threshold) & (values <= current + threshold)]
+        filtered += len(values) - len(valid)
+        if len(valid) == 0:
+            break
+        current = valid.sum() / len(valid)
+    return current, filtered
+
+
+def window_refine(segments, ratings, initial, threshold, tol=1e-6):
+    """
+    Trimmed-mean refinement of every segment at once.
+
+    Each segment starts from its initial mean, keeps the ratings inside
+    [mean - threshold, mean + threshold] and moves to their mean, until the
+    mean changes by at most tol or no rating is left in the window (the
+    mean then stays where it was). Passes work on the flat arrays with
+    masks and segmented sums; segments that converged leave the working
+    arrays, so passes run until the last segment converges. A segment with
+    a rating within WINDOW_BORDERLINE of a window edge (or a change within
+    WINDOW_BORDERLINE of tol) is redone with _refine_segment, so every
+    keep/drop decision is the one the per-item loop makes.
+
+    Returns (means, filtered), where filtered counts, over all passes, the
+    ratings outside the window, as the notebooks' counter does.
+    """
+    n_segments = len(initial)
+    means = np.array(initial, dtype=np.float64)
+    seg = np.asarray(segments)
+    r = np.asarray(ratings, dtype=np.float64)
+    totals = np.bincount(seg, minlength=n_segments).astype(np.float64)
+    filtered = np.zeros(n_segments)
+    borderline = np.zeros(n_segments, dtype=bool)
+    all_seg, all_r = seg, r
+
+    while len(seg):
+        current = means[seg]
+        lower, upper = current - threshold, current + threshold
+        inside = (r >= lower) & (r <= upper)
+        near = (np.abs(r - lower) <= WINDOW_BORDERLINE) | (np.abs(r - upper) <= WINDOW_BORDERLINE)
+        borderline[seg[near]] = True
+
+        count = np.bincount(seg, weights=inside, minlength=n_segments)
+        total = np.bincount(seg, weights=np.where(inside, r, 0), minlength=n_segments)
+        active = np.zeros(n_segments, dtype=bool)
+        active[seg] = True
+        filtered[active] += (totals - count)[active]
+
+        moving = active & (count > 0)
+        previous = means.copy()
+        means[moving] = total[moving] / count[moving]
+        change = np.abs(means - previous)
+        borderline |= moving & (np.abs(change - tol) <= WINDOW_BORDERLINE)
+        still_active = moving & (change > tol) & ~borderline
+
+        keep = still_active[seg]
+        seg, r = seg[keep], r[keep]
+
+    redo = np.nonzero(borderline)[0]
+    if len(redo):
+        order = np.argsort(all_seg, kind="stable")
+        ptr = np.r_[0, np.cumsum(np.bincount(all_seg, minlength=n_segments))]
+        for k in redo:
+            values = all_r[order[ptr[k]:ptr[k + 1]]]
+            means[k], filtered[k] = _refine_segment(values, initial[k], threshold, tol)
+
+    return means, int(filtered.sum())
+
+
+def refine_cluster_ratings(df, user_groups, threshold, user_col="user_id", item_col="item_id",
+                           rating_col="normalized_rating", tol=1e-6):
+    """
+    Batch version of the notebooks' compute_cluster_ratings + refine_cluster_ratings.
+
+    Every (cluster, item) segment starts from its groupby mean and is
+    refined with window_refine. Returns ({cluster index (from 1): {item:
+    rating}}, total ratings, total filtered), items in sorted order as
+    groupby gives.
+    """
+    data = ClusterKeyedRatings(df, user_groups, user_col, item_col, rating_col)
+    ratings = data.ratings[data.rows]
+    initial = pd.Series(ratings).groupby(data.row_keys).mean().to_numpy()
+    means, filtered = window_refine(data.row_keys, ratings, initial, threshold, tol)
+
+    item_ids = np.asarray(data.item_ids)
+    refined = {cluster: {} for cluster in range(1, len(user_groups) + 1)}
+    for cluster, item, mean in zip(data.key_clusters.tolist(), item_ids[data.key_items].tolist(), means.tolist()):
+        refined[cluster + 1][item] = mean
+    return refined, len(ratings), filtered
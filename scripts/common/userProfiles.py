@@ -0,0 +1,208 @@
+from collections.abc import Mapping
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix
+
+CODE_DTYPE = np.uint32
+
+
+class IdIndex:
+    """
+    Interned raw ids (reviewerID / asin strings, ISBNs, integer ids).
+
+    Every distinct id gets a dense uint32 code; ids holds the reverse
+    lookup (code -> raw id) and the hash index the forward one.
+    """
+
+    def __init__(self, ids):
+        self.ids = np.asarray(ids)
+        if len(self.ids) > np.iinfo(CODE_DTYPE).max:
+            raise ValueError(f"Too many ids for {np.dtype(CODE_DTYPE).name} codes: {len(self.ids)}")
+        self._index = pd.Index(self.ids)
+
+    @classmethod
+    def from_values(cls, values, sort=False, use_na_sentinel=True):
+        """
+        (codes, index) of a column of raw ids, ids in order of first appearance (or sorted).
+
+        Missing ids get code -1 unless use_na_sentinel is False, which interns NaN as an id.
+        """
+        codes, ids = pd.factorize(np.asarray(values), sort=sort, use_na_sentinel=use_na_sentinel)
+        return codes, cls(ids)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, raw_id):
+        return raw_id in self._index
+
+    def code(self, raw_id):
+        return self._index.get_loc(raw_id)
+
+    def codes(self, raw_ids):
+        """Codes of many raw ids at once; -1 for ids that were never interned."""
+        return self._index.get_indexer(list(raw_ids))
+
+
+class UserProfiles(Mapping):
+    """
+    Every user's rated items and ratings as contiguous CSR slices.
+
+    Users and items are interned once into IdIndex codes; user u's item
+    codes and ratings are item_codes[indptr[u]:indptr[u + 1]] and the same
+    slice of ratings, so per-user access is two views without allocation
+    and the whole dataset is three flat arrays instead of one dict per user.
+
+    The container is also a read-only {user: {item: rating}} mapping, so
+    code written for the scripts' user_ratings dicts runs on it unchanged
+    (each lookup builds that one user's dict); the vectorized kernels use
+    the arrays directly through matrix().
+    """
+
+    def __init__(self, users, items, indptr, item_codes, ratings):
+        self.users = users
+        self.items = items
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.item_codes = np.asarray(item_codes, dtype=CODE_DTYPE)
+        self.ratings = np.asarray(ratings, dtype=np.float64)
+
+    @classmethod
+    def from_user_ratings(cls, user_ratings):
+        """Container of a {user: {item: rating}} dict; users and items coded in dict order."""
+        if isinstance(user_ratings, cls):
+            return user_ratings
+        item_index = {}
+        indptr = [0]
+        item_codes = []
+        ratings = []
+        for profile in user_ratings.values():
+            for item, rating in profile.items():
+                item_codes.append(item_index.setdefault(item, len(item_index)))
+                ratings.append(rating)
+            indptr.append(len(item_codes))
+        items = np.empty(len(item_index), dtype=object)
+        items[:] = list(item_index)
+        users = np.empty(len(user_ratings), dtype=object)
+        users[:] = list(user_ratings)
+        return cls(IdIndex(users), IdIndex(items), indptr, item_codes, ratings)
+
+    @classmethod
+    def from_dataframe(cls, df, user_col="user_id", item_col="item_id", rating_col="normalized_rating"):
+        """
+        Same profiles as the scripts'
+        {user: dict(zip(group[item_col], group[rating_col])) for user, group in df.groupby(user_col)}:
+        users sorted, each user's items in row order, and a (user, item)
+        rated twice keeps its first position with its last rating. Rows of
+        a missing user are dropped, as groupby drops them; a missing item is
+        one NaN item.
+        """
+        user_codes, users = IdIndex.from_values(df[user_col], sort=True)
+        item_codes, items = IdIndex.from_values(df[item_col], use_na_sentinel=False)
+        ratings = df[rating_col].to_numpy(dtype=np.float64)
+
+        rows = np.nonzero(user_codes >= 0)[0]  # groupby drops missing users
+        rows = rows[np.argsort(user_codes[rows], kind="stable")]
+        keys = user_codes[rows].astype(np.int64) * max(len(items), 1) + item_codes[rows]
+        _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        last = np.zeros(len(first), dtype=np.int64)
+        np.maximum.at(last, inverse.ravel(), np.arange(len(rows)))
+        kept = np.sort(first)
+        last = last[inverse.ravel()[kept]]
+
+        # Items recoded in order of first appearance over the sorted users, as from_user_ratings codes them
+        kept_items, first_items = pd.factorize(item_codes[rows[kept]])
+        counts = np.bincount(user_codes[rows[kept]], minlength=len(users))
+        return cls(users, IdIndex(items.ids[first_items]), np.r_[0, np.cumsum(counts)], kept_items, ratings[rows[last]])
+
+    @property
+    def n_users(self):
+        return len(self.users)
+
+    @property
+    def n_items(self):
+        return len(self.items)
+
+    def degrees(self):
+        return np.diff(self.indptr)
+
+    def user_items(self, u):
+        """Item codes rated by the user with code u (a view)."""
+        return self.item_codes[self.indptr[u]:self.indptr[u + 1]]
+
+    def user_ratings(self, u):
+        """Ratings of the user with code u, aligned with user_items(u) (a view)."""
+        return self.ratings[self.indptr[u]:self.indptr[u + 1]]
+
+    def profile(self, u):
+        """{raw item: rating} of the user with code u."""
+        return dict(zip(self.items.ids[self.user_items(u)].tolist(), self.user_ratings(u).tolist()))
+
+    def matrix(self):
+        """users x items csr_matrix on the container's arrays."""
+        return csr_matrix((self.ratings, self.item_codes.astype(np.int64), self.indptr),
+                          shape=(self.n_users, self.n_items))
+
+    def __getitem__(self, user):
+        return self.profile(self.users.code(user))
+
+    def __iter__(self):
+        return iter(self.users.ids.tolist())
+
+    def __len__(self):
+        return self.n_users
+
+    def __contains__(self, user):
+        return user in self.users
+
+    def nbytes(self):
+        return self.indptr.nbytes + self.item_codes.nbytes + self.ratings.nbytes
+
+
+class ClusterKeyedRatings:
+    """
+    Rating rows tagged with the user cluster(s) they belong to.
+
+    Every rating of a clustered user is attached to the (cluster, item) key
+    of each cluster containing that user: rows are the DataFrame rows of
+    those (row, cluster) pairs, in DataFrame order, and row_keys their key,
+    numbered in (cluster, item) order with key_clusters / key_items giving
+    each key's parts. Items are coded in sorted order (the groupby order
+    of the per-cluster loops), users in order of first appearance. Shared
+    by the cluster-aware rankings (clusterReputation, userAgnostic), which
+    run their segmented sums over row_keys.
+    """
+
+    def __init__(self, df, user_groups, user_col="user_id", item_col="item_id", rating_col="normalized_rating"):
+        self.user_codes, self.users = IdIndex.from_values(df[user_col])
+        self.item_codes, self.items = IdIndex.from_values(df[item_col], sort=True)
+        self.user_ids, self.item_ids = self.users.ids, self.items.ids
+        self.ratings = df[rating_col].to_numpy(dtype=np.float64)
+        self.n_users = len(self.user_ids)
+        self.n_items = len(self.item_ids)
+
+        # (user code, cluster) memberships, then one row per (rating row, cluster) pair
+        member_users, member_clusters = [], []
+        for cluster, group in enumerate(user_groups):
+            codes = self.users.codes(group)
+            codes = codes[codes >= 0]
+            member_users.append(codes)
+            member_clusters.append(np.full(len(codes), cluster))
+        member_users = np.concatenate(member_users) if member_users else np.array([], dtype=np.int64)
+        member_clusters = np.concatenate(member_clusters) if member_clusters else np.array([], dtype=np.int64)
+
+        rows_by_user = np.argsort(self.user_codes, kind="stable")
+        user_ptr = np.r_[0, np.cumsum(np.bincount(self.user_codes, minlength=self.n_users))]
+        per_member = user_ptr[member_users + 1] - user_ptr[member_users]
+        offsets = np.arange(per_member.sum()) - np.repeat(np.cumsum(per_member) - per_member, per_member)
+        rows = rows_by_user[np.repeat(user_ptr[member_users], per_member) + offsets]
+        clusters = np.repeat(member_clusters, per_member)
+        order = np.argsort(rows, kind="stable")
+        self.rows, clusters = rows[order], clusters[order]
+
+        keys, self.row_keys = np.unique(clusters.astype(np.int64) * self.n_items + self.item_codes[self.rows],
+                                        return_inverse=True)
+        self.row_keys = self.row_keys.ravel()
+        self.key_clusters = keys // self.n_items if self.n_items else keys
+        self.key_items = keys % self.n_items if self.n_items else keys
+        self.n_keys = len(keys)
@@ -1,10 +1,16 @@
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "common"))
+from datasetCache import load_dataframe
 
 def aggregated_ranking_algorithm(file_path):
-    # Load dataset (assuming "::" is the separator with no headers)
-    df = pd.read_csv(file_path, sep="::", engine="python", names=["user_id", "item_id", "rating", "timestamp", "normalized_rating"])
+    # Load dataset (tab-separated u.data), normalized on the fly as (r - r_min + 1) / (r_max - r_min + 1)
+    df = load_dataframe(file_path, "udata", {"user": "user_id", "item": "item_id", "rating": "rating",
+                                             "timestamp": "timestamp", "shifted": "normalized_rating"}, r_min=1, r_max=5)
     
     # Compute item rankings as a simple average of normalized ratings
     item_rankings = df.groupby("item_id")["normalized_rating"].mean().to_dict()
@@ -12,7 +18,7 @@ def aggregated_ranking_algorithm(file_path):
     return item_rankings
 
 # Example usage
-rankings = aggregated_ranking_algorithm("/home/martimsbaltazar/Desktop/tese/datasets/ml-100k/normalized_rating_movielens_100k.dat")
+rankings = aggregated_ranking_algorithm("/home/martimsbaltazar/Desktop/tese/datasets/ml-100k/u.data")
 
 # Extract the ratings from the rankings
 ratings = list(rankings.values())
@@ -1,28 +1,25 @@
-def sort_dat_file(input_file, output_file):
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "common"))
+from externalSort import external_sort
+
+def sort_dat_file(input_file, output_file, key="user", memory_bytes=64 << 20, output_format="movielens"):
     """
-    Sorts a .dat file based on the first attribute (user_id).
+    Sorts a .dat file based on the first attribute (user_id), or on key
+    ("user", "item", "timestamp" or a tuple of them).
+
+    The sort is external: runs of at most memory_bytes are sorted and
+    spilled to temporary files, then k-way merged, so memory does not grow
+    with the file size. Equal keys keep their order in the input.
 
     Args:
         input_file (str): Path to the input .dat file.
-        output_file (str): Path to the output .dat file.
+        output_file (str): Path to the output .dat file (or column directory).
+        output_format (str): "movielens" for "::" lines, "columns" for the binary column cache.
     """
     try:
-        with open(input_file, 'r') as infile:
-            lines = infile.readlines()
-
-        # Parse lines into lists, convert user_id to int for sorting
-        data = []
-        for line in lines:
-            parts = line.strip().split('::')
-            data.append((int(parts[0]), parts))  # Store user_id as int
-
-        # Sort the data based on user_id (the first element of each tuple)
-        data.sort(key=lambda x: x[0])
-
-        # Write the sorted data to the output file
-        with open(output_file, 'w') as outfile:
-            for user_id, parts in data:
-                outfile.write('::'.join(parts) + '\n')
+        external_sort(input_file, output_file, key, memory_bytes, output_format)
 
         print(f"Successfully sorted '{input_file}' and saved to '{output_file}'")
 
@@ -1,63 +1,28 @@
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "common"))
+from sparseBipartite import sparse_bipartite_ranking
+from datasetCache import load_dataframe
 
 def bipartite_ranking_algorithm(file_path, lambda_factor=0.3, tol=1e-6, max_iter=2):
-    # Step 1: Load dataset (MovieLens format with "::" separator)
-    df = pd.read_csv(file_path, sep="::", engine="python", names=["user_id", "item_id", "rating", "timestamp", "normalized_rating"])
-    
-    # Step 2: Get unique users and items
-    users = df["user_id"].unique()
-    items = df["item_id"].unique()
+    # Step 1: Load dataset (tab-separated u.data), normalized on the fly as (r - r_min + 1) / (r_max - r_min + 1)
+    df = load_dataframe(file_path, "udata", {"user": "user_id", "item": "item_id", "rating": "rating",
+                                             "timestamp": "timestamp", "shifted": "normalized_rating"}, r_min=1, r_max=5)
     
-    # Step 3: Initialize user reputations (equal for all users)
-    user_reputation = {user: 1.0 for user in users}
-    
-    for iteration in range(max_iter):
-        prev_item_rankings = {} if iteration == 0 else item_rankings.copy()
-
-        # Step 4: Update item rankings
-        item_rankings = {}
-        for item in items:
-            item_ratings = df[df["item_id"] == item]  # Ratings given to a specific movie
-            users_who_rated = item_ratings["user_id"].values  # Users who rated this movie
-            
-            if len(users_who_rated) == 0:
-                continue
-            
-            # Step 5: Compute weighted sum of ratings using user reputation
-            weighted_sum = sum(float(user_reputation[u]) * float(r) for u, r in zip(users_who_rated, item_ratings["normalized_rating"].values))
-            total_weight = len(users_who_rated)
-            
-            # Step 6: Assign ranking to item
-            item_rankings[item] = weighted_sum / total_weight if total_weight > 0 else 0
-        
-        # Step 7: Update user reputations
-        for user in users:
-            user_ratings = df[df["user_id"] == user]
-            items_rated = user_ratings["item_id"].values
-            
-            if len(items_rated) == 0:
-                continue
-            
-            # Step 8: Compute average rating error
-            rating_errors = [abs(r - item_rankings[i]) for i, r in zip(items_rated, user_ratings["normalized_rating"].values)]
-            avg_error = sum(rating_errors) / len(rating_errors)
-            
-            # Step 9: Update user reputation
-            user_reputation[user] = 1 - lambda_factor * avg_error
-            user_reputation[user] = max(user_reputation[user], 0)  # Ensure non-negative reputation
-        
-        # Step 10: Check for convergence
-        if iteration > 0:
-            ranking_diff = sum(abs(prev_item_rankings[i] - item_rankings[i]) for i in items if i in prev_item_rankings)
-            if ranking_diff < tol:
-                break
+    # Step 2-10: Iterate item rankings and user reputations with the sparse engine
+    # (users and items are integer-coded once; each iteration is two sparse mat-vec products)
+    item_rankings, user_reputation = sparse_bipartite_ranking(
+        df, "user_id", "item_id", "normalized_rating", lambda_factor=lambda_factor, tol=tol, max_iter=max_iter
+    )
     
     return item_rankings
 
 # Example usage
-file_path = "/home/martim/Desktop/tese/datasets/ml-100k/normalized_rating_movielens_100k.dat"  # Adjust to your actual dataset path
+file_path = "/home/martim/Desktop/tese/datasets/ml-100k/u.data"  # Adjust to your actual dataset path
 rankings = bipartite_ranking_algorithm(file_path)
 
 # Extract the ratings from the rankings
@@ -1,43 +1,25 @@
-import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "common"))
+from userAgnostic import dataset_user_agnostic_ranking
+from datasetCache import load_dataset
 
 def user_agnostic_ranking(file_path, tol=1e-6):
-    # Step 1: Load dataset (MovieLens format with "::" separator)
-    df = pd.read_csv(file_path, sep="::", engine="python", names=["UserID", "MovieID", "Rating", "Timestamp", "NormalizedRating"])
+    # Step 1: Load dataset (tab-separated u.data) through the binary column cache
+    dataset = load_dataset(file_path, "udata")
     
-    # Step 2: Define output dictionary for item rankings
-    item_rankings = {}
-
-    # Step 3: Iterate over all unique items (movies)
-    for item, ratings in df.groupby("MovieID")["NormalizedRating"]:
-        ratings = list(ratings)  # Convert to list
-        converged = False
-
-        # Step 5: Loop until a fixed point is reached
-        while not converged:
-            # Step 6: Compute the mean (μᵢ) of ratings for movie i
-            μ_i = np.mean(ratings)
-            
-            # Step 7: Compute the standard deviation (σᵢ)
-            σ_i = np.std(ratings) if len(ratings) > 1 else 0
-
-            # Step 8: Filter out ratings that deviate significantly from the mean
-            new_ratings = [r for r in ratings if (r - μ_i) ** 2 <= σ_i]
-
-            # Step 9: Check for convergence (if no ratings were removed)
-            converged = (len(new_ratings) == len(ratings))
-
-            # Step 10: Update the ratings
-            ratings = new_ratings
-        
-        # Step 12: Compute the final ranking as the mean of the filtered ratings
-        item_rankings[item] = np.mean(ratings)
+    # Step 2-12: Filter every item's ratings with (r - μᵢ)² <= σᵢ until no rating is removed,
+    # for all items at once on per-item rating-level counts, and rank by the filtered mean;
+    # ratings are normalized as (r - r_min + 1) / (r_max - r_min + 1) on the rating-level table
+    item_rankings = dataset_user_agnostic_ranking(dataset, "shifted", r_min=1, r_max=5)
 
     return item_rankings
 
 # Example usage
-file_path = "/home/martim/Desktop/tese/datasets/ml-100k/normalized_rating_movielens_100k.dat"  # Adjust to your actual dataset path
+file_path = "/home/martim/Desktop/tese/datasets/ml-100k/u.data"  # Adjust to your actual dataset path
 rankings = user_agnostic_ranking(file_path)
 
 # Extract the ratings from the rankings
@@ -1,10 +1,16 @@
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "common"))
+from datasetCache import load_dataframe
 
 def aggregated_ranking_algorithm(file_path):
-    # Load dataset (assuming "::" is the separator with no headers)
-    df = pd.read_csv(file_path, sep="::", engine="python", names=["user_id", "item_id", "rating", "timestamp", "normalized_rating"])
+    # Load dataset (assuming "::" is the separator with no headers), normalized on the fly as r' = r / 5
+    df = load_dataframe(file_path, "movielens", {"user": "user_id", "item": "item_id", "rating": "rating",
+                                                 "timestamp": "timestamp", "divide_max": "normalized_rating"})
     
     # Compute item rankings as a simple average of normalized ratings
     item_rankings = df.groupby("item_id")["normalized_rating"].mean().to_dict()
@@ -12,7 +18,7 @@ def aggregated_ranking_algorithm(file_path):
     return item_rankings
 
 # Example usage
-rankings = aggregated_ranking_algorithm("/home/martimsbaltazar/Desktop/tese/datasets/ml-1m/normalized_ratings.dat")
+rankings = aggregated_ranking_algorithm("/home/martimsbaltazar/Desktop/tese/datasets/ml-1m/ratings.dat")
 
 # Extract the ratings from the rankings
 ratings = list(rankings.values())
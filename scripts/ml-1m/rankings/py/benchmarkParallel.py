@@ -0,0 +1,59 @@
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "common"))
+from outOfCoreBipartite import read_rating_chunks
+from parallelBipartite import ParallelBipartiteRanker
+from sparseBipartite import RatingMatrix, bipartite_fixed_point
+
+# Datasets used for the scaling benchmark: (name, path, format)
+DATASETS = [
+    ("ml-1m", "/home/martimsbaltazar/Desktop/tese/datasets/ml-1m/normalized_ratings.dat", "movielens"),
+    ("bookcrossing", "/home/martim/Desktop/tese/datasets/book_crossing/book_ratings_normalized.dat", "tsv"),
+]
+
+
+def load_matrix(file_path, fmt):
+    users, items, ratings = zip(*read_rating_chunks(file_path, fmt))
+    df = pd.DataFrame({
+        "user_id": np.concatenate(users),
+        "item_id": np.concatenate(items),
+        "normalized_rating": np.concatenate(ratings),
+    })
+    return RatingMatrix.from_dataframe(df)
+
+
+# Time a fixed number of iterations (tol=0) so every worker count does the same work
+def benchmark(matrix, max_workers, iterations=20, repeats=3):
+    start = time.perf_counter()
+    reference, _, _ = bipartite_fixed_point(matrix, tol=0, max_iter=iterations)
+    serial = time.perf_counter() - start
+    print(f"  single-process sparse engine: {serial:.3f}s")
+
+    # n_workers=1 is the serial fast path; more workers than cores only measure synchronization
+    for n_workers in range(1, max_workers + 1):
+        with ParallelBipartiteRanker(matrix, n_workers=n_workers) as ranker:
+            times = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                rankings, _, _ = ranker.run(tol=0, max_iter=iterations)
+                times.append(time.perf_counter() - start)
+        best = min(times)
+        gap = np.abs(rankings - reference).max()
+        print(f"  {n_workers:2d} workers: {best:.3f}s  speedup {serial / best:5.2f}x  max diff {gap:.1e}")
+
+
+if __name__ == "__main__":
+    max_workers = int(sys.argv[1]) if len(sys.argv) > 1 else os.cpu_count()
+
+    for name, file_path, fmt in DATASETS:
+        if not os.path.exists(file_path):
+            print(f"{name}: {file_path} not found, skipping")
+            continue
+        matrix = load_matrix(file_path, fmt)
+        print(f"{name}: {matrix.n_users} users, {matrix.n_items} items, {len(matrix.ratings)} ratings")
+        benchmark(matrix, max_workers)
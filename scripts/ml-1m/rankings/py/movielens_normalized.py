@@ -1,24 +1,25 @@
-import pandas as pd
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "common"))
+from datasetCache import load_dataframe
 
 # File paths (modify these as needed)
 input_file = "/home/martimsbaltazar/Desktop/tese/datasets/ml-1m/ratings.dat"
 output_file = "/home/martimsbaltazar/Desktop/tese/datasets/ml-1m/normalized_ratings.dat"
 
-# Load data (assuming "::" separator and no header)
-df = pd.read_csv(input_file, sep="::", names=["UserID", "MovieID", "Rating", "Timestamp"], engine="python")
-
-# Normalize ratings: r' = r / 5
-df["NormalizedRating"] = df["Rating"] / 5
-
-# Save with single-character separator first (to avoid pandas error)
-temp_file = "/home/martimsbaltazar/Desktop/tese/datasets/ml-1m/temp_ratings.dat"
-df.to_csv(temp_file, sep="|", index=False, header=False)
-
-# Replace "|" with "::" manually
-with open(temp_file, "r") as f:
-    data = f.read().replace("|", "::")
+# Load data (assuming "::" separator and no header) through the binary column cache,
+# with ratings normalized as r' = r / 5 from the rating-level lookup table
+df = load_dataframe(input_file, "movielens", {"user": "UserID", "item": "MovieID", "rating": "Rating",
+                                              "timestamp": "Timestamp", "divide_max": "NormalizedRating"})
 
+# The python scripts normalize ratings.dat on the fly through the cache; this copy is still
+# written because the ipynb notebooks (rankingAttackers, userAgnosticBipartite_ml-1m,
+# reputationBipartite_ml-1m) read the normalized column from it.
+# Write the "::" separated lines directly (to_csv only accepts single-character separators)
 with open(output_file, "w") as f:
-    f.write(data)
+    f.writelines(f"{u}::{m}::{int(r)}::{t}::{n}\n" for u, m, r, t, n in zip(
+        df["UserID"].tolist(), df["MovieID"].tolist(), df["Rating"].tolist(),
+        df["Timestamp"].tolist(), df["NormalizedRating"].tolist()))
 
 print(f"Normalization complete. Saved as '{output_file}'.")
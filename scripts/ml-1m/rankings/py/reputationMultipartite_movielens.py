@@ -5,10 +5,23 @@ import zlib
 from itertools import combinations
 import random
 import matplotlib.pyplot as plt
-
-# Load dataset (MovieLens format with "::" separator)
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "common"))
+from fixedPoint import print_trace
+from clusterReputation import cluster_reputation_ranking
+from similarityEngine import similarity_graph as blocked_similarity_graph
+from compressionKernel import compression_graph
+from kolmogorovGraph import kolmogorov_graph
+from profileCache import compute_compressed_sizes
+from datasetCache import load_dataframe
+from userProfiles import UserProfiles
+
+# Load dataset (MovieLens format with "::" separator), normalized on the fly as r' = r / 5
 def load_dataset(file_path):
-    df = pd.read_csv(file_path, sep="::", engine="python", header=None, names=["user_id", "movie_id", "rating", "timestamp", "normalized_rating"])
+    df = load_dataframe(file_path, "movielens", {"user": "user_id", "item": "movie_id", "rating": "rating",
+                                                 "timestamp": "timestamp", "divide_max": "normalized_rating"})
     return df
 
 # Visualize a subgraph of the similarity network
@@ -61,7 +74,19 @@ def kolmogorov_similarity(ratings_u, ratings_v):
 
 # Compute user similarity matrix and construct graph
 def compute_similarity_matrix(df, similarity_measure, threshold=0.3):
-    user_ratings = {user: dict(zip(group["movie_id"], group["normalized_rating"])) for user, group in df.groupby("user_id")}
+    # Interned user / movie codes with each user's ratings as one CSR slice (read like a dict of dicts)
+    user_ratings = UserProfiles.from_dataframe(df, "user_id", "movie_id", "normalized_rating")
+
+    # Linear similarity has a blocked sparse engine that gives the same graph
+    if similarity_measure is linear_similarity:
+        return blocked_similarity_graph(user_ratings, "linear", threshold)
+    # Compression similarity runs on the parallel kernel with primed compressors
+    if similarity_measure is compression_similarity:
+        return compression_graph(user_ratings, threshold, compute_compressed_sizes(user_ratings))
+    # Kolmogorov similarity only depends on compressed sizes: sorted sweep instead of all pairs
+    if similarity_measure is kolmogorov_similarity:
+        return kolmogorov_graph(user_ratings, threshold, compute_compressed_sizes(user_ratings))
+
     similarity_graph = nx.Graph()
 
     for (u, v) in combinations(user_ratings.keys(), 2):
@@ -76,62 +101,15 @@ def detect_groups(similarity_graph):
     return list(nx.connected_components(similarity_graph))
 
 # Compute reputation-based ranking for each group
-def reputation_based_ranking(df, user_groups, lambda_factor=0.3, tol=1e-6, max_iter=10):
-    item_rankings = {item: 0.5 for item in df["movie_id"].unique()}  # Default starting ranking
-    user_reputation = {user: 1.0 for user in df["user_id"].unique()}
-
-    for iteration in range(max_iter):
-        print("Iteration", iteration)
-        prev_rankings = item_rankings.copy()
-
-        # Compute rankings per cluster
-        cluster_rankings = {}
-        for group in user_groups:
-            group_users = list(group)
-            group_df = df[df["user_id"].isin(group_users)]
-
-            for item, group_item in group_df.groupby("movie_id"):
-                users = group_item["user_id"].values
-                weighted_sum = sum(user_reputation[u] * r for u, r in zip(users, group_item["normalized_rating"].values))
-                total_weight = sum(user_reputation[u] for u in users)
-                cluster_rankings.setdefault(item, {})[frozenset(group)] = weighted_sum / total_weight if total_weight > 0 else None
-
-        # Assign rankings: if a movie is unrated in a cluster, inherit from the nearest cluster
-        for item in item_rankings.keys():
-            assigned = False
-            for group in user_groups:
-                if frozenset(group) in cluster_rankings.get(item, {}):
-                    item_rankings[item] = cluster_rankings[item][frozenset(group)]
-                    assigned = True
-                    break
-            if not assigned:  # Inherit from the closest cluster with a ranking
-                for other_item in cluster_rankings:
-                    for cluster in cluster_rankings[other_item]:
-                        if cluster_rankings[other_item][cluster] is not None:
-                            item_rankings[item] = cluster_rankings[other_item][cluster]
-                            break
-
-        # Update user reputations within each cluster
-        for user in df["user_id"].unique():
-            user_ratings = df[df["user_id"] == user]
-            items_rated = user_ratings["movie_id"].values
-
-            if len(items_rated) == 0:
-                continue
-
-            rating_errors = [abs(r - item_rankings[i]) for i, r in zip(items_rated, user_ratings["normalized_rating"].values)]
-            avg_error = sum(rating_errors) / len(rating_errors)
-            
-            user_reputation[user] = max(1 - lambda_factor * avg_error, 0)
-
-        print("Iteration", iteration, "done")
-        
-        # Check for convergence
-        ranking_diff = sum(abs(prev_rankings[i] - item_rankings[i]) for i in item_rankings if prev_rankings[i] is not None)
-        if iteration > 0 and ranking_diff < tol:
-            break
-
-    return item_rankings
+# The fixed-point driver stops once no item ranking moves by more than tol (L-infinity);
+# acceleration can be None, "aitken" or "anderson"
+def reputation_based_ranking(df, user_groups, lambda_factor=0.3, tol=1e-6, max_iter=10, acceleration=None):
+    # Cluster codes are attached to the rating rows once; each iteration is a grouped
+    # reduction per (cluster, item) and one vectorized pass over the rating errors
+    rankings, trace = cluster_reputation_ranking(df, user_groups, "user_id", "movie_id", "normalized_rating",
+                                                 lambda_factor, tol, max_iter, acceleration)
+    print_trace(trace)
+    return rankings
 
 # Main execution
 file_path = "/home/martim/Desktop/tese/datasets/ml-1m/ratings.dat"